@@ -1,2 +1,4 @@
-from algorithms.solver import solve
+from algorithms.solver import (solve, count_solutions, sample_solutions,
+                               solution_at, solutions_range,
+                               has_unique_solution)
 from algorithms.generator import generate_field
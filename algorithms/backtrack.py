@@ -0,0 +1,157 @@
+import itertools
+from numberlink import HexLink, CELL_EMPTY
+
+"""
+Поиск решений перебором с возвратом. Пути прокладываются от одного из
+концов каждой пары: на каждом шаге продлевается путь, у головы которого
+меньше всего вариантов хода. Ветвь отсекается, если какая-то пустая клетка
+не может оказаться внутри пути или пустые клетки нельзя распределить между
+недостроенными путями. Годится, когда нужно одно или несколько решений, а
+строить диаграмму всех решений слишком дорого.
+"""
+
+
+class Search:
+    def __init__(self, instance: HexLink):
+        self.positions = [(i, j) for i, level in enumerate(instance)
+                          for j in range(len(level))]
+        index = {position: k for k, position in enumerate(self.positions)}
+        self.neighbours = [[index[neighbour]
+                            for neighbour in instance.get_neighbours(*cell)]
+                           for cell in self.positions]
+        self.owner = [instance[cell] for cell in self.positions]
+        self.head = {}
+        self.target = {}
+        for k, number in enumerate(self.owner):
+            if number != CELL_EMPTY:
+                if number in self.head:
+                    self.target[number] = k
+                else:
+                    self.head[number] = k
+        self.unfinished = set(self.head)
+        self.empty = self.owner.count(CELL_EMPTY)
+        self.path = []
+
+    def get_moves(self, number):
+        target = self.target[number]
+        return [cell for cell in self.neighbours[self.head[number]]
+                if self.owner[cell] == CELL_EMPTY or cell == target]
+
+    def move(self, number, cell):
+        self.path.append((self.head[number], cell))
+        self.head[number] = cell
+        if cell == self.target[number]:
+            self.unfinished.remove(number)
+        else:
+            self.owner[cell] = number
+            self.empty -= 1
+
+    def undo(self, number, cell):
+        previous, _ = self.path.pop()
+        self.head[number] = previous
+        if cell == self.target[number]:
+            self.unfinished.add(number)
+        else:
+            self.owner[cell] = CELL_EMPTY
+            self.empty += 1
+
+    def is_consistent(self):
+        """
+        Проверяет, что каждая пустая клетка имеет хотя бы двух соседей,
+        через которых может пройти путь, а каждая область пустых клеток
+        примыкает к голове и концу одного недостроенного пути, причем у
+        каждого такого пути есть область (или конец рядом с головой), по
+        которой его можно достроить.
+        """
+        ends = {}
+        for number in self.unfinished:
+            ends.setdefault(self.head[number], set()).add(number)
+            ends.setdefault(self.target[number], set()).add(number)
+        for cell, owner in enumerate(self.owner):
+            if owner == CELL_EMPTY:
+                usable = sum(self.owner[neighbour] == CELL_EMPTY
+                             or neighbour in ends
+                             for neighbour in self.neighbours[cell])
+                if usable < 2:
+                    return False
+
+        connected = {number for number in self.unfinished
+                     if self.target[number] in
+                     self.neighbours[self.head[number]]}
+        region = [None] * len(self.owner)
+        for start, owner in enumerate(self.owner):
+            if owner != CELL_EMPTY or region[start] is not None:
+                continue
+            region[start] = start
+            stack = [start]
+            heads, targets = set(), set()
+            while stack:
+                cell = stack.pop()
+                for neighbour in self.neighbours[cell]:
+                    if self.owner[neighbour] == CELL_EMPTY:
+                        if region[neighbour] is None:
+                            region[neighbour] = start
+                            stack.append(neighbour)
+                    elif neighbour in ends:
+                        for number in ends[neighbour]:
+                            if self.head[number] == neighbour:
+                                heads.add(number)
+                            if self.target[number] == neighbour:
+                                targets.add(number)
+            passing = heads & targets
+            if not passing:
+                return False
+            connected |= passing
+        return connected >= self.unfinished
+
+    def solve(self):
+        """
+        Генерирует решения в виде списков ребер. Перебор ведется по явному
+        стеку кадров [число, итератор ходов, сделанный ход], поэтому длина
+        путей не ограничена глубиной рекурсии.
+        """
+        if not self.unfinished:
+            if not self.empty:
+                yield self.get_solution()
+            return
+        if not self.is_consistent():
+            return
+        stack = [self.branch()]
+        while stack:
+            frame = stack[-1]
+            number, moves, cell = frame
+            if cell is not None:
+                self.undo(number, cell)
+            cell = frame[2] = next(moves, None)
+            if cell is None:
+                stack.pop()
+                continue
+            self.move(number, cell)
+            if not self.unfinished:
+                if not self.empty:
+                    yield self.get_solution()
+            elif self.is_consistent():
+                stack.append(self.branch())
+
+    def branch(self):
+        """
+        Возвращает кадр перебора для пути, у головы которого меньше всего
+        вариантов хода.
+        """
+        number, moves = min(
+            ((number, self.get_moves(number)) for number in self.unfinished),
+            key=lambda item: (len(item[1]), item[0])
+        )
+        return [number, iter(moves), None]
+
+    def get_solution(self):
+        return [sorted((self.positions[u], self.positions[v]))
+                for u, v in self.path]
+
+
+def solve_backtracking(instance: HexLink, limit=None):
+    """
+    Принимает на вход задачу Numberlink и максимальное количество решений.
+    Возвращает генератор решений задачи, найденных перебором с возвратом.
+    """
+    return itertools.islice(Search(instance).solve(), limit)
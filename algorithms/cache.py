@@ -0,0 +1,270 @@
+import collections
+import itertools
+import json
+import random
+import sqlite3
+from numberlink import HexLink, format_field
+from algorithms import solver
+
+"""
+Кэш решений задач Numberlink. Задачи, совпадающие с точностью до симметрии
+поля и перенумерации пар, имеют общий канонический вид (см.
+HexagonalField.canonical_form), поэтому решаются один раз. Решения
+хранятся для канонической задачи и переводятся в решения исходной при
+выдаче. В базе sqlite записи хранятся в формате JSON.
+"""
+
+DEFAULT_SOLUTIONS = 100
+DEFAULT_MEMORY = 64 * 2 ** 20
+
+
+class SolutionCache:
+    """
+    Хранит для канонической задачи количество решений и первые solutions
+    решений в порядке solver.solve. Записи вытесняются в порядке давности
+    использования, когда их суммарный размер превышает memory байт. Если
+    указан путь path, записи также сохраняются в базе sqlite, которую
+    могут одновременно использовать несколько процессов.
+    """
+    def __init__(self, solutions=DEFAULT_SOLUTIONS, memory=DEFAULT_MEMORY,
+                 path=None):
+        if solutions < 0:
+            raise ValueError("Количество решений должно быть неотрицательным.")
+        self.solutions = solutions
+        self.memory = memory
+        self.used = 0
+        self.entries = collections.OrderedDict()
+        self.database = None
+        if path is not None:
+            self.database = sqlite3.connect(path, timeout=60)
+            with self.database:
+                self.database.execute(
+                    "CREATE TABLE IF NOT EXISTS entries "
+                    "(key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, instance: HexLink):
+        return self._get_key(instance.canonical_form()[0]) in self.entries
+
+    def close(self):
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def solve(self, instance: HexLink, limit=None, progress=None,
+              engine="auto", jobs=1):
+        """
+        Принимает на вход задачу Numberlink, максимальное количество решений,
+        необязательную функцию хода построения (см. solver.build_diagram),
+        способ решения (см. solver.ENGINES) и количество процессов.
+        Возвращает итератор решений задачи. Решения сверх сохраненных
+        вычисляются заново, только если до них дойдет обход. Решения,
+        найденные перебором с возвратом, идут в другом порядке и поэтому не
+        сохраняются. Явно выбранный SAT-решатель вызывается всегда, чтобы
+        решения действительно были найдены им.
+        """
+        engine = solver.choose_engine(engine, limit)
+        canonical, transform = instance.canonical_form()
+        key = self._get_key(canonical)
+        entry = self._lookup(key)
+        if (not self._serves_solve(entry, engine)
+                and engine in ("sat", "backtrack")):
+            solutions = solver.solve(canonical, limit, engine=engine)
+        elif entry["solutions"] is None:
+            solutions = solver.solve(canonical, progress=progress, jobs=jobs)
+            first = list(itertools.islice(solutions, self.solutions + 1))
+            entry["solutions"] = first[:self.solutions]
+            if len(first) <= self.solutions:
+                entry["count"] = len(first)
+            self._store(key, entry)
+            if len(first) > self.solutions:
+                solutions = itertools.chain(first, solutions)
+            else:
+                solutions = first
+        elif self._is_complete(entry):
+            solutions = entry["solutions"]
+        else:
+            solutions = itertools.chain(
+                entry["solutions"],
+                itertools.islice(self._lazy_solve(canonical, progress, jobs),
+                                 len(entry["solutions"]), None)
+            )
+        return map(transform.restore_solution,
+                   itertools.islice(solutions, limit))
+
+    def count_solutions(self, instance: HexLink, limit=None, jobs=1,
+                        diagrams=None):
+        """
+        Принимает на вход задачу Numberlink, необязательную границу,
+        количество процессов и, если они уже построены, диаграммы ее
+        областей (см. solver.build_regions).
+        Возвращает количество ее решений или min(количество, limit).
+        """
+        canonical, _ = instance.canonical_form()
+        key = self._get_key(canonical)
+        entry = self._lookup(key)
+        if entry["count"] is None:
+            if diagrams is None:
+                count = solver.count_solutions(canonical, limit, jobs)
+            else:
+                # Симметрия поля не меняет количество решений
+                count = solver.count_combinations(diagrams, limit)
+            if limit is not None and count >= limit:
+                return count
+            entry["count"] = count
+            self._store(key, entry)
+        count = entry["count"]
+        return count if limit is None else min(count, limit)
+
+    def has_unique_solution(self, instance: HexLink):
+        return self.count_solutions(instance, limit=2) == 1
+
+    def solutions_range(self, instance: HexLink, start, stop=None, jobs=1):
+        """
+        Принимает на вход задачу Numberlink, границы полуинтервала номеров и
+        количество процессов.
+        Возвращает итератор решений с номерами из [start, stop) в порядке
+        solve.
+        """
+        canonical, transform = instance.canonical_form()
+        entry = self._lookup(self._get_key(canonical))
+        if self._serves_range(entry, stop):
+            solutions = entry["solutions"][start:stop]
+        else:
+            solutions = solver.solutions_range(canonical, start, stop, jobs)
+        return map(transform.restore_solution, solutions)
+
+    def sample_solutions(self, instance: HexLink, k, seed=None):
+        """
+        Принимает на вход задачу Numberlink, количество решений и зерно.
+        Возвращает список из k равновероятно выбранных решений (см.
+        solver.sample_solutions).
+        """
+        canonical, transform = instance.canonical_form()
+        entry = self._lookup(self._get_key(canonical))
+        if entry["solutions"] is not None and self._is_complete(entry):
+            if not entry["solutions"]:
+                return []
+            generator = random.Random(seed)
+            solutions = [generator.choice(entry["solutions"])
+                         for _ in range(k)]
+        else:
+            solutions = solver.sample_solutions(canonical, k, seed)
+        return [transform.restore_solution(solution)
+                for solution in solutions]
+
+    def describe_engine(self, instance: HexLink, limit=None, engine="auto",
+                        offset=0):
+        """
+        Принимает на вход задачу Numberlink, максимальное количество
+        решений, способ решения и номер первого решения.
+        Возвращает, откуда будут взяты решения: из кэша ("cache (zdd)", в
+        кэше хранятся решения из диаграммы) или от решателя (см.
+        solver.describe_engine). Решения с ненулевым номером без кэша
+        всегда берутся из диаграммы (см. solutions_range).
+        """
+        entry = self._lookup(self._get_key(instance.canonical_form()[0]))
+        if offset:
+            stop = None if limit is None else offset + limit
+            return "cache (zdd)" if self._serves_range(entry, stop) else "zdd"
+        if self._serves_solve(entry, solver.choose_engine(engine, limit)):
+            return "cache (zdd)"
+        return solver.describe_engine(engine, limit)
+
+    @staticmethod
+    def _get_key(canonical):
+        return format_field(canonical.field)
+
+    @staticmethod
+    def _is_complete(entry):
+        return (entry["count"] is not None and entry["solutions"] is not None
+                and entry["count"] <= len(entry["solutions"]))
+
+    @staticmethod
+    def _serves_solve(entry, engine):
+        """
+        Проверяет, что solve выдаст решения из записи, а не от решателя.
+        """
+        return engine != "sat" and entry["solutions"] is not None
+
+    @classmethod
+    def _serves_range(cls, entry, stop):
+        """
+        Проверяет, что в записи есть все решения с номерами меньше stop.
+        """
+        stored = entry["solutions"]
+        if stored is None:
+            return False
+        return (cls._is_complete(entry)
+                or stop is not None and stop <= len(stored))
+
+    @staticmethod
+    def _lazy_solve(canonical, progress, jobs):
+        yield from solver.solve(canonical, progress=progress, jobs=jobs)
+
+    def _lookup(self, key):
+        """
+        Возвращает запись кэша по ключу, при необходимости загружая ее из
+        базы, или новую пустую запись.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+        if self.database is not None:
+            row = self.database.execute(
+                "SELECT data FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = self._decode(row[0])
+                if entry is not None:
+                    self._remember(key, entry, len(row[0]))
+                    return entry
+        return {"count": None, "solutions": None}
+
+    @staticmethod
+    def _decode(data):
+        """
+        Возвращает запись, сохраненную в базе, или None, если данные не
+        являются записью в формате JSON (например, записаны старой
+        версией кэша). Такая запись вычисляется и сохраняется заново.
+        """
+        try:
+            entry = json.loads(data)
+            solutions = entry["solutions"]
+            if solutions is not None:
+                entry["solutions"] = [[[tuple(cell) for cell in edge]
+                                       for edge in solution]
+                                      for solution in solutions]
+            return {"count": entry["count"], "solutions": entry["solutions"]}
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    def _store(self, key, entry):
+        data = json.dumps(entry)
+        self._remember(key, entry, len(data))
+        if self.database is not None:
+            with self.database:
+                self.database.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?)",
+                    (key, data)
+                )
+
+    def _remember(self, key, entry, size):
+        if key in self.entries:
+            self.used -= self.entries.pop(key)[1]
+        if size > self.memory:
+            return
+        self.entries[key] = entry, size
+        self.used += size
+        while self.used > self.memory:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.used -= evicted
@@ -0,0 +1,96 @@
+"""
+Таблицы фронтира, которые вычисляются один раз для задачи и упорядоченного
+списка ребер. Вершины нумеруются с единицы в порядке появления в ребрах,
+значение 0 функции mate означает, что вершина уже имеет степень 2.
+"""
+
+
+class Level:
+    """
+    Таблица уровня диаграммы, соответствующего одному ребру.
+    Состояние уровня - значения mate на domain: вершинах фронтира до
+    обработки ребра, за которыми следуют входящие вершины ребра entering.
+    positions - индекс вершин domain, ends - позиции концов ребра,
+    leaving - покидающие фронтир вершины в виде (позиция, вершина,
+    является ли концом пары), keep - позиции вершин domain, которые
+    остаются во фронтире следующего уровня.
+    """
+    __slots__ = ("index", "edge", "pair", "ends", "entering", "positions",
+                 "leaving", "keep")
+
+    def __init__(self, index, edge, pair, entering, positions, leaving,
+                 keep):
+        self.index = index
+        self.edge = edge
+        self.pair = pair
+        self.entering = entering
+        self.positions = positions
+        self.ends = tuple(positions[v] for v in pair)
+        self.leaving = leaving
+        self.keep = keep
+
+
+class Frontier:
+    def __init__(self, vertices, levels, is_target, partner, leave):
+        self.vertices = vertices
+        self.levels = levels
+        self.is_target = is_target
+        self.partner = partner
+        self.leave = leave
+
+    def is_closed(self, vertex, index):
+        """
+        Проверяет, что к концу пути vertex после обработки ребра index уже
+        нельзя присоединить другие ребра: вершина является концом пары или
+        покинула фронтир.
+        """
+        return vertex != 0 and (self.is_target[vertex]
+                                or self.leave[vertex] <= index)
+
+
+def compile_frontier(edges, targets):
+    """
+    Принимает на вход упорядоченный список ребер и словарь целей задачи
+    (см. HexLink.get_targets).
+    Возвращает таблицы фронтира для каждого ребра.
+    """
+    ids = {}
+    for edge in edges:
+        for vertex in edge:
+            ids.setdefault(vertex, len(ids) + 1)
+    vertices = [None, *ids]
+
+    leave = [0] * len(vertices)
+    for i, edge in enumerate(edges):
+        for vertex in edge:
+            leave[ids[vertex]] = i
+
+    is_target = [False] * len(vertices)
+    for vertex in targets["vertices"]:
+        if vertex in ids:
+            is_target[ids[vertex]] = True
+
+    partner = [0] * len(vertices)
+    for pair in targets["pairs"]:
+        first, second = tuple(pair)
+        if first in ids and second in ids:
+            partner[ids[first]] = ids[second]
+            partner[ids[second]] = ids[first]
+
+    levels = []
+    frontier = []
+    for i, edge in enumerate(edges):
+        pair = tuple(ids[v] for v in edge)
+        current = set(frontier)
+        entering = tuple(v for v in pair if v not in current)
+        domain = frontier + list(entering)
+        positions = {v: k for k, v in enumerate(domain)}
+        leaving = tuple((positions[v], v, is_target[v])
+                        for v in pair if leave[v] == i)
+        frontier = [v for v in domain if leave[v] != i]
+        keep = tuple(positions[v] for v in frontier)
+        levels.append(
+            Level(i, edge, pair, entering, positions, leaving, keep)
+        )
+
+    return Frontier(vertices, levels, is_target, partner, leave)
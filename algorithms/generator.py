@@ -1,21 +1,34 @@
 import random
 import itertools
-from numberlink import HexagonalField, MAX_NUMBER, CELL_EMPTY
+import multiprocessing
+from numberlink import (HexagonalField, HexLink, MAX_NUMBER, CELL_EMPTY,
+                        generate_hexagonal_field)
+from algorithms.solver import (solve, build_regions, count_combinations,
+                               count_edge_solutions)
 
 
 MAX_SIZE = 5
 MIN_SIZE = 3
+MAX_REPAIRS = 30
+# Больше решений при слиянии и удлинении путей не перебирается
+MAX_COUNTED_SOLUTIONS = 1000
 
 
 class Path:
     def __init__(self, start=None, end=None):
         self.start = start
         self.end = end
+        self.cells = [] if start is None else [start]
 
 
 class PathConstructor:
-    def __init__(self, field):
+    """
+    Строит случайные пути, покрывающие поле. Случайные числа берутся из
+    rng: модуля random или отдельного экземпляра random.Random.
+    """
+    def __init__(self, field, rng=random):
         self.field = field
+        self.rng = rng
         self.covered_cells = 0
         self.cells_amount = centered_hex_number((self.field.size + 1) // 2)
         self.paths = []
@@ -68,7 +81,7 @@ class PathConstructor:
         не создает изолированных точек.
         """
         neighbours = list(self.field.get_neighbours(*position))
-        start = random.randint(0, len(neighbours) - 1)
+        start = self.rng.randint(0, len(neighbours) - 1)
         if not self.has_isolated_empty_cells(position, number, False):
             for pos in neighbours[start:] + neighbours[:start]:
                 if self.field[pos] == CELL_EMPTY:
@@ -85,7 +98,7 @@ class PathConstructor:
         """
         empties = list(get_empty_cells(self.field))
         if empties:
-            start = random.randint(0, len(empties) - 1)
+            start = self.rng.randint(0, len(empties) - 1)
             for head in empties[start:] + empties[:start]:
                 if self.can_add_cell(head, self.number):
                     tail = self.get_path_extension_neighbour(head, self.number)
@@ -96,6 +109,7 @@ class PathConstructor:
     def add_new_path(self, head, tail):
         number = self.number
         self.paths.append(Path(head))
+        self.paths[-1].cells.append(tail)
         self.field[head] = self.field[tail] = number
         self.covered_cells += 2
         while True:
@@ -103,17 +117,46 @@ class PathConstructor:
             tail = self.get_path_extension_neighbour(head, number)
             if tail is not None and self.covered_cells < self.cells_amount:
                 self.field[tail] = number
+                self.paths[-1].cells.append(tail)
                 self.covered_cells += 1
             else:
                 self.paths[-1].end = head
                 return
 
     def get_field_with_pairs(self):
-        field = generate_hexagonal_field(self.field.size)
-        for i, path in enumerate(self.paths):
-            for level, index in [path.start, path.end]:
-                field[level][index] = i + 1
-        return field
+        return get_field_with_ends(
+            self.field.size, [path.cells for path in self.paths]
+        )
+
+    def get_repairs(self, paths):
+        """
+        Принимает на вход пути в виде списков клеток.
+        Генерирует в случайном порядке исправленные наборы путей, для
+        которых исходные пути остаются решением. Сначала идут разрезы пути
+        на два (части пути - два последних пути набора): они не добавляют
+        задаче новых решений. Затем - слияния двух
+        путей с соседними концами и удлинения пути за счет концевой клетки
+        соседнего пути.
+        """
+        cuts = [(i, k) for i, path in enumerate(paths)
+                for k in range(2, len(path) - 1)]
+        self.rng.shuffle(cuts)
+        for i, k in cuts:
+            rest = paths[:i] + paths[i + 1:]
+            yield rest + [paths[i][:k], paths[i][k:]]
+
+        pairs = list(itertools.permutations(range(len(paths)), 2))
+        self.rng.shuffle(pairs)
+        for a, b in pairs:
+            rest = [path for i, path in enumerate(paths) if i not in (a, b)]
+            for first in (paths[a], paths[a][::-1]):
+                neighbours = set(self.field.get_neighbours(*first[-1]))
+                for second in (paths[b], paths[b][::-1]):
+                    if second[0] not in neighbours:
+                        continue
+                    yield rest + [first + second]
+                    if len(second) > 2:
+                        yield rest + [first + second[:1], second[1:]]
 
     def construct(self):
         while True:
@@ -126,13 +169,68 @@ class PathConstructor:
                     return self.get_field_with_pairs()
                 else:
                     field = generate_hexagonal_field(self.field.size)
-                    self.__init__(HexagonalField(field))
+                    self.__init__(HexagonalField(field), self.rng)
+
+    def construct_unique(self):
+        """
+        Строит задачу с единственным решением. Единственность проверяется
+        перебором до второго решения. Пока решений несколько, применяет
+        исправление путей (см. repair). Если исправить задачу не удалось,
+        строит новую.
+        """
+        while True:
+            self.construct()
+            paths = [path.cells for path in self.paths]
+            for _ in range(MAX_REPAIRS):
+                if len(paths) > MAX_NUMBER:
+                    break
+                field = get_field_with_ends(self.field.size, paths)
+                if count_first_solutions(field, 2) == 1:
+                    return field
+                paths = self.repair(paths, field)
+                if paths is None:
+                    break
+            field = generate_hexagonal_field(self.field.size)
+            self.__init__(HexagonalField(field), self.rng)
+
+    def repair(self, paths, field):
+        """
+        Принимает на вход пути задачи с несколькими решениями и ее поле.
+        Возвращает первое исправление путей (см. get_repairs), уменьшающее
+        количество решений, или None, если такого нет.
+        """
+        diagrams = build_regions(HexLink(field))
+        amount = count_combinations(diagrams)
+        # Решения задачи с разрезанным путем - это решения исходной задачи,
+        # проходящие разрезанное ребро, поэтому разрезы оцениваются по одной
+        # диаграмме
+        through = count_edge_solutions(diagrams)
+        limit = min(amount, MAX_COUNTED_SOLUTIONS)
+        for repaired in self.get_repairs(paths):
+            if len(repaired) > len(paths):
+                edge = frozenset([repaired[-2][-1], repaired[-1][0]])
+                if through[edge] < amount:
+                    return repaired
+            else:
+                field = get_field_with_ends(self.field.size, repaired)
+                if count_first_solutions(field, limit) < limit:
+                    return repaired
+        return None
 
 
 def count(iterable):
     return sum(1 for _ in iterable)
 
 
+def count_first_solutions(field, limit):
+    """
+    Принимает на вход поле задачи и границу.
+    Возвращает min(количество решений, limit). Решения перебираются с
+    возвратом, и перебор останавливается на limit-м решении.
+    """
+    return count(solve(HexLink(field), limit, engine="backtrack"))
+
+
 def centered_hex_number(n):
     return 3 * n * (n - 1) + 1
 
@@ -144,17 +242,56 @@ def get_empty_cells(field: HexagonalField):
                 yield i, j
 
 
-def generate_hexagonal_field(size):
-    distance = size - size // 2
-    sequence = itertools.chain(range(distance, size),
-                               range(size, distance - 1, -1))
-    return [[0] * i for i in sequence]
+def get_field_with_ends(size, paths):
+    """
+    Принимает на вход размер поля и пути в виде списков клеток.
+    Возвращает поле, в котором концы i-го пути помечены числом i + 1.
+    """
+    field = generate_hexagonal_field(size)
+    for i, path in enumerate(paths):
+        for level, index in [path[0], path[-1]]:
+            field[level][index] = i + 1
+    return field
 
 
-def generate_field(size=None):
+def generate_field(size=None, unique=False, rng=random):
+    """
+    Принимает на вход размер поля, флаг unique и источник случайных чисел
+    (см. PathConstructor).
+    Возвращает случайную задачу Numberlink. Если флаг установлен, у задачи
+    гарантированно ровно одно решение.
+    """
     if size % 2 == 0:
         raise ValueError("Размер поля должен быть нечетным числом.")
-    size = size or random.randrange(MIN_SIZE, MAX_SIZE + 1, 2)
+    size = size or rng.randrange(MIN_SIZE, MAX_SIZE + 1, 2)
     field = generate_hexagonal_field(size)
-    constructor = PathConstructor(HexagonalField(field))
+    constructor = PathConstructor(HexagonalField(field), rng)
+    if unique:
+        return constructor.construct_unique()
     return constructor.construct()
+
+
+def generate_fields(size, amount, seed=None, jobs=1, unique=False,
+                    ordered=True):
+    """
+    Принимает на вход размер поля, количество задач, зерно, количество
+    процессов, флаг unique (см. generate_field) и флаг ordered.
+    Генерирует пары (номер, задача). Генератор случайных чисел i-й задачи
+    инициализируется парой (seed, i), поэтому задача с данным номером не
+    зависит от количества процессов. Если флаг ordered установлен, пары
+    идут по возрастанию номеров, иначе - по мере готовности.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 63)
+    tasks = ((i, size, unique, f"{seed}-{i}") for i in range(amount))
+    if jobs == 1:
+        yield from map(generate_seeded_field, tasks)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(generate_seeded_field, tasks)
+
+
+def generate_seeded_field(task):
+    index, size, unique, seed = task
+    return index, generate_field(size, unique, random.Random(seed))
@@ -0,0 +1,167 @@
+import collections
+from numberlink import HexagonalField
+
+"""
+Порядок обхода ребер определяет размер фронтира - множества вершин,
+которые уже встречались в обработанных ребрах и еще встретятся в
+необработанных. От максимального размера фронтира зависят память и время
+построения диаграммы решений.
+"""
+
+Ordering = collections.namedtuple("Ordering", ["name", "edges", "width"])
+
+
+def get_axial(field: HexagonalField, position):
+    """
+    Принимает на вход поле и клетку.
+    Возвращает осевые координаты клетки (q, r): соседние клетки отличаются
+    на (±1, 0), (0, ±1), (1, -1) или (-1, 1).
+    """
+    level, index = position
+    return index - min(level, field.size // 2), level
+
+
+def get_edges(field: HexagonalField):
+    """
+    Возвращает ребра графа поля в виде пар [u, v], где u < v.
+    """
+    return [sorted(edge) for edge in field.make_graph().edges()]
+
+
+def order_by_vertices(edges, key):
+    """
+    Принимает на вход ребра и ключ, задающий порядок обхода вершин.
+    Ребро обрабатывается, как только пройдены обе его вершины.
+    """
+    return sorted(edges, key=lambda edge: sorted(map(key, edge))[::-1])
+
+
+def row_major(field: HexagonalField, edges):
+    """
+    Обход по строкам поля.
+    """
+    return order_by_vertices(edges, lambda v: v)
+
+
+def diagonal_sweep(field: HexagonalField, edges):
+    """
+    Обход вдоль диагонали, параллельной ребрам (i, j) - (i + 1, j + 1)
+    верхней половины поля.
+    """
+    def key(position):
+        q, r = get_axial(field, position)
+        return q, r
+
+    return order_by_vertices(edges, key)
+
+
+def antidiagonal_sweep(field: HexagonalField, edges):
+    """
+    Обход вдоль второй диагонали поля.
+    """
+    def key(position):
+        q, r = get_axial(field, position)
+        return -q - r, r
+
+    return order_by_vertices(edges, key)
+
+
+def bfs_order(field: HexagonalField, edges):
+    """
+    Обход вершин в порядке Катхилла-Макки: поиск в ширину из периферийной
+    вершины, соседи просматриваются по возрастанию степени.
+    Не использует геометрию поля и подходит для любого графа, в том числе
+    несвязного.
+    """
+    if not edges:
+        return []
+    adjacent = collections.defaultdict(list)
+    for u, v in edges:
+        adjacent[u].append(v)
+        adjacent[v].append(u)
+
+    def bfs(start):
+        order = {start: 0}
+        queue = collections.deque([start])
+        while queue:
+            vertex = queue.popleft()
+            neighbours = sorted(
+                (v for v in adjacent[vertex] if v not in order),
+                key=lambda v: (len(adjacent[v]), v)
+            )
+            for neighbour in neighbours:
+                order[neighbour] = len(order)
+                queue.append(neighbour)
+        return order
+
+    # Периферийная вершина компоненты - последняя в обходе из ее вершины
+    # наименьшей степени. Несвязный граф обходится по компонентам.
+    order = {}
+    for vertex in sorted(adjacent, key=lambda v: (len(adjacent[v]), v)):
+        if vertex not in order:
+            component = bfs(vertex)
+            for v in bfs(max(component, key=component.get)):
+                order[v] = len(order)
+    return order_by_vertices(edges, order.get)
+
+
+STRATEGIES = collections.OrderedDict([
+    ("row", row_major),
+    ("diagonal", diagonal_sweep),
+    ("antidiagonal", antidiagonal_sweep),
+    ("bfs", bfs_order),
+])
+
+
+def frontier_width(edges):
+    """
+    Принимает на вход упорядоченный список ребер.
+    Возвращает максимальный размер фронтира при их обходе.
+    """
+    first, last = {}, {}
+    for i, edge in enumerate(edges):
+        for vertex in edge:
+            first.setdefault(vertex, i)
+            last[vertex] = i
+    delta = [0] * (len(edges) + 1)
+    for vertex in first:
+        delta[first[vertex]] += 1
+        delta[last[vertex]] -= 1
+    width = current = 0
+    for change in delta:
+        current += change
+        width = max(width, current)
+    return width
+
+
+def make_ordering(field: HexagonalField, strategy, edges=None):
+    """
+    Принимает на вход поле, название стратегии и ребра (по умолчанию - все
+    ребра поля).
+    Возвращает порядок обхода ребер вместе с размером фронтира.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Неизвестный порядок обхода: {strategy}")
+    edges = get_edges(field) if edges is None else edges
+    ordered = STRATEGIES[strategy](field, edges)
+    return Ordering(strategy, ordered, frontier_width(ordered))
+
+
+def get_orderings(field: HexagonalField, edges=None):
+    """
+    Возвращает все порядки обхода ребер поля вместе с размерами фронтира.
+    """
+    edges = get_edges(field) if edges is None else edges
+    return [make_ordering(field, name, edges) for name in STRATEGIES]
+
+
+def order_edges(field: HexagonalField, strategy=None, edges=None):
+    """
+    Принимает на вход поле, название стратегии и ребра.
+    Возвращает порядок обхода ребер. Если стратегия не указана, выбирается
+    порядок с наименьшим размером фронтира.
+    """
+    if strategy is not None:
+        return make_ordering(field, strategy, edges)
+    orderings = get_orderings(field, edges)
+    return min(orderings, key=lambda ordering: ordering.width)
@@ -0,0 +1,121 @@
+import collections
+from numberlink import HexLink
+from algorithms.ordering import get_edges
+
+"""
+Предварительное распространение ограничений перед построением диаграммы.
+В решении у конца пары ровно одно ребро, у остальных клеток - ровно два,
+а пути не образуют циклов и не соединяют разные числа. Из этих условий
+часть ребер оказывается обязательной, а часть - невозможной.
+"""
+
+FREE, FIXED, REMOVED = 0, 1, 2
+
+
+class Reduction:
+    """
+    Результат предварительной обработки: оставшиеся ребра в исходном
+    порядке, обязательные и удаленные ребра (в виде кортежей) и признак
+    того, что противоречие не найдено.
+    """
+    def __init__(self, edges, fixed, removed, feasible):
+        self.edges = edges
+        self.fixed = fixed
+        self.removed = removed
+        self.feasible = feasible
+
+    @property
+    def total(self):
+        return len(self.edges) + len(self.removed)
+
+
+class Infeasible(Exception):
+    pass
+
+
+def presolve(instance: HexLink, edges=None):
+    """
+    Принимает на вход задачу Numberlink и ребра (по умолчанию - все ребра
+    поля).
+    Возвращает результат распространения ограничений (см. Reduction).
+    """
+    edges = get_edges(instance) if edges is None else edges
+    keys = [tuple(edge) for edge in edges]
+    number = {v: instance[v] for v in instance.get_targets()["vertices"]}
+
+    incident = collections.defaultdict(list)
+    for key in keys:
+        for vertex in key:
+            incident[vertex].append(key)
+    status = dict.fromkeys(keys, FREE)
+
+    # Обязательные ребра образуют фрагменты путей, которые хранятся в
+    # системе непересекающихся множеств вместе с концами и числом
+    parent = {v: v for v in incident}
+    ends = {v: (v, v) for v in incident}
+    label = {v: number.get(v) for v in incident}
+
+    def find(vertex):
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    def can_join(u, v):
+        first, second = find(u), find(v)
+        return first != second and (label[first] is None
+                                    or label[second] is None
+                                    or label[first] == label[second])
+
+    def get_other_end(root, vertex):
+        first, second = ends[root]
+        return second if first == vertex else first
+
+    def fix(key):
+        u, v = key
+        if not can_join(u, v):
+            raise Infeasible()
+        first, second = find(u), find(v)
+        new_ends = get_other_end(first, u), get_other_end(second, v)
+        parent[second] = first
+        ends[first] = new_ends
+        if label[first] is None:
+            label[first] = label[second]
+        status[key] = FIXED
+        queue.extend((u, v, *new_ends))
+
+    def remove(key):
+        status[key] = REMOVED
+        queue.extend(key)
+
+    queue = collections.deque(incident)
+    try:
+        while queue:
+            vertex = queue.popleft()
+            free = []
+            fixed = 0
+            for key in incident[vertex]:
+                if status[key] == FIXED:
+                    fixed += 1
+                elif status[key] == FREE:
+                    if can_join(*key):
+                        free.append(key)
+                    else:
+                        remove(key)
+            need = 1 if vertex in number else 2
+            if fixed > need or fixed + len(free) < need:
+                raise Infeasible()
+            if fixed == need:
+                for key in free:
+                    remove(key)
+            elif fixed + len(free) == need:
+                for key in free:
+                    fix(key)
+        feasible = True
+    except Infeasible:
+        feasible = False
+
+    fixed = {key for key in keys if status[key] == FIXED}
+    removed = {key for key in keys if status[key] == REMOVED}
+    remaining = [edge for edge, key in zip(edges, keys) if key not in removed]
+    return Reduction(remaining, fixed, removed, feasible)
@@ -0,0 +1,48 @@
+"""
+Разбиение задачи на независимые области. После предварительной обработки
+(см. algorithms.presolve) оставшиеся ребра часто распадаются на несколько
+компонент связности. Путь не может перейти из одной компоненты в другую,
+поэтому решения каждой области ищутся отдельно, а решения задачи - это
+все сочетания решений областей.
+"""
+
+
+def split_regions(edges):
+    """
+    Принимает на вход список ребер.
+    Возвращает список компонент связности: списков ребер в исходном
+    порядке, упорядоченных по первому ребру компоненты.
+    """
+    parent = {}
+
+    def find(vertex):
+        parent.setdefault(vertex, vertex)
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    for u, v in edges:
+        parent[find(u)] = find(v)
+    regions = {}
+    for edge in edges:
+        regions.setdefault(find(edge[0]), []).append(edge)
+    return list(regions.values())
+
+
+def are_pairs_inside(regions, targets):
+    """
+    Принимает на вход области (см. split_regions) и цели задачи (см.
+    HexLink.get_targets).
+    Проверяет, что оба конца каждой пары лежат в одной области.
+    """
+    region = {}
+    for k, edges in enumerate(regions):
+        for edge in edges:
+            for vertex in edge:
+                region[vertex] = k
+    for pair in targets["pairs"]:
+        first, second = tuple(pair)
+        if first not in region or region.get(first) != region.get(second):
+            return False
+    return True
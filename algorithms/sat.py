@@ -0,0 +1,245 @@
+import collections
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+from numberlink import HexLink
+from algorithms.ordering import get_edges
+from algorithms.presolve import presolve
+
+"""
+Решение задачи через SAT-решатель, установленный локально: библиотеку
+pycosat или программу, читающую формат DIMACS. Переменные задают
+использованные ребра и число (цвет) каждой клетки. Ограничения степеней
+не исключают отдельных циклов из пустых клеток, поэтому найденный цикл
+запрещается дополнительным дизъюнктом и решатель запускается снова.
+Каждое найденное решение также запрещается, чтобы получить следующее.
+"""
+
+# Программы, которые ищутся в PATH, в порядке предпочтения
+BINARIES = ("minisat", "glucose", "cadical", "kissat", "picosat",
+            "cryptominisat5")
+# Программы, записывающие модель в файл, переданный вторым аргументом;
+# остальные выводят ее в строках "v ..." стандартного вывода
+RESULT_FILE_BINARIES = ("minisat", "glucose")
+
+
+class Encoding:
+    """
+    Кодирование задачи в КНФ. Переменные 1..len(edges) соответствуют
+    ребрам, следующие - парам (клетка, число).
+    """
+    def __init__(self, instance: HexLink, reduction=None):
+        self.edges = [tuple(edge) for edge in get_edges(instance)]
+        self.edge_variables = {edge: k + 1
+                               for k, edge in enumerate(self.edges)}
+        self.cells = [(i, j) for i, level in enumerate(instance)
+                      for j in range(len(level))]
+        self.index = {cell: k for k, cell in enumerate(self.cells)}
+        self.targets = {cell: instance[cell] for cell in self.cells
+                        if instance[cell] != 0}
+        self.numbers = sorted(set(self.targets.values()))
+        self.variables = len(self.edges) + len(self.cells) * len(self.numbers)
+
+        incident = collections.defaultdict(list)
+        for edge in self.edges:
+            for cell in edge:
+                incident[cell].append(self.edge_variables[edge])
+
+        self.clauses = []
+        for cell in self.cells:
+            colours = [self.colour(cell, number) for number in self.numbers]
+            self.clauses.append(colours)
+            self.clauses.extend([-a, -b]
+                                for a, b in itertools.combinations(colours, 2))
+            if cell in self.targets:
+                self.clauses.append([self.colour(cell, self.targets[cell])])
+                self.add_exactly_one(incident[cell])
+            else:
+                self.add_exactly_two(incident[cell])
+        for (u, v), variable in self.edge_variables.items():
+            for number in self.numbers:
+                first, second = self.colour(u, number), self.colour(v, number)
+                self.clauses.append([-variable, -first, second])
+                self.clauses.append([-variable, first, -second])
+
+        if reduction is not None:
+            self.clauses.extend([self.edge_variables[edge]]
+                                for edge in reduction.fixed)
+            self.clauses.extend([-self.edge_variables[edge]]
+                                for edge in reduction.removed)
+
+    def colour(self, cell, number):
+        return (len(self.edges) + self.index[cell] * len(self.numbers)
+                + self.numbers.index(number) + 1)
+
+    def add_exactly_one(self, variables):
+        self.clauses.append(list(variables))
+        self.clauses.extend([-a, -b]
+                            for a, b in itertools.combinations(variables, 2))
+
+    def add_exactly_two(self, variables):
+        # Не меньше двух: среди любых len - 1 переменных есть истинная
+        for skipped in variables:
+            self.clauses.append([v for v in variables if v != skipped])
+        self.clauses.extend([-a, -b, -c] for a, b, c in
+                            itertools.combinations(variables, 3))
+
+    def decode(self, model):
+        """
+        Принимает на вход множество истинных переменных.
+        Возвращает использованные ребра.
+        """
+        return [edge for edge in self.edges
+                if self.edge_variables[edge] in model]
+
+    def get_cycles(self, edges):
+        """
+        Возвращает компоненты выбранных ребер, не содержащие концов пар:
+        при выполненных ограничениях степеней это циклы.
+        """
+        adjacent = collections.defaultdict(list)
+        for edge in edges:
+            u, v = edge
+            adjacent[u].append(edge)
+            adjacent[v].append(edge)
+        seen = set()
+        cycles = []
+        for start in adjacent:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            component = set()
+            has_target = False
+            while stack:
+                cell = stack.pop()
+                has_target = has_target or cell in self.targets
+                for edge in adjacent[cell]:
+                    component.add(edge)
+                    for other in edge:
+                        if other not in seen:
+                            seen.add(other)
+                            stack.append(other)
+            if not has_target:
+                cycles.append(sorted(component))
+        return cycles
+
+
+class PycosatBackend:
+    name = "pycosat"
+
+    def __init__(self, module):
+        self.module = module
+
+    def solve(self, clauses, variables):
+        """
+        Возвращает множество истинных переменных или None, если формула
+        невыполнима.
+        """
+        result = self.module.solve(clauses, vars=variables)
+        if isinstance(result, str):
+            if result == "UNSAT":
+                return None
+            raise ValueError(f"SAT-решатель не справился: {result}")
+        return {literal for literal in result if literal > 0}
+
+
+class BinaryBackend:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def solve(self, clauses, variables):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "problem.cnf")
+            result = os.path.join(directory, "result")
+            with open(source, "w") as file:
+                file.write(f"p cnf {variables} {len(clauses)}\n")
+                for clause in clauses:
+                    file.write(" ".join(map(str, clause)) + " 0\n")
+            arguments = [self.path, source]
+            if self.name in RESULT_FILE_BINARIES:
+                arguments.append(result)
+            output = subprocess.run(arguments, capture_output=True,
+                                    text=True).stdout
+            if self.name in RESULT_FILE_BINARIES:
+                with open(result) as file:
+                    output = "\n".join(
+                        ("s " if i == 0 else "v ") + line
+                        for i, line in enumerate(file.read().splitlines())
+                    )
+        return self.parse(output)
+
+    @staticmethod
+    def parse(output):
+        """
+        Разбирает ответ решателя: строку "s SAT..."/"s UNSAT..." и строки
+        "v" с литералами модели.
+        """
+        model = set()
+        status = None
+        for line in output.splitlines():
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "s":
+                status = words[1]
+            elif words[0] == "v":
+                model.update(int(word) for word in words[1:]
+                             if int(word) > 0)
+        if status in ("UNSAT", "UNSATISFIABLE"):
+            return None
+        if status not in ("SAT", "SATISFIABLE"):
+            raise ValueError("Не удалось разобрать ответ SAT-решателя.")
+        return model
+
+
+def find_backend(name=None):
+    """
+    Принимает на вход название решателя ("pycosat", имя программы или путь
+    к ней). Если название не указано, выбирается первый доступный.
+    Возвращает решатель или выбрасывает ValueError, если он не найден.
+    """
+    if name in (None, "pycosat"):
+        try:
+            import pycosat
+            return PycosatBackend(pycosat)
+        except ImportError:
+            if name is not None:
+                raise ValueError("Библиотека pycosat не установлена.")
+    for binary in ((name,) if name is not None else BINARIES):
+        path = shutil.which(binary)
+        if path is not None:
+            return BinaryBackend(path)
+    raise ValueError("Не найден SAT-решатель: установите pycosat или одну "
+                     f"из программ {', '.join(BINARIES)}.")
+
+
+def solve_sat(instance: HexLink, limit=None, backend=None):
+    """
+    Принимает на вход задачу Numberlink, максимальное количество решений и
+    решатель (см. find_backend).
+    Генерирует решения задачи, каждый раз запрещая уже найденные.
+    """
+    backend = find_backend() if backend is None else backend
+    reduction = presolve(instance)
+    if not reduction.feasible:
+        return
+    encoding = Encoding(instance, reduction)
+    clauses = list(encoding.clauses)
+    found = 0
+    while limit is None or found < limit:
+        model = backend.solve(clauses, encoding.variables)
+        if model is None:
+            return
+        edges = encoding.decode(model)
+        cycles = encoding.get_cycles(edges)
+        if cycles:
+            clauses.extend([-encoding.edge_variables[edge] for edge in cycle]
+                           for cycle in cycles)
+            continue
+        yield [list(edge) for edge in edges]
+        found += 1
+        clauses.append([-encoding.edge_variables[edge] for edge in edges])
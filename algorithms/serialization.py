@@ -0,0 +1,91 @@
+import mmap
+import struct
+from algorithms.ordering import Ordering
+from algorithms.structures import Node, Diagram
+
+"""
+Двоичный формат сокращенной диаграммы решений. За заголовком следуют
+название порядка обхода, упорядоченные ребра и таблица узлов в порядке
+уровней. Узел записывается номером своего ребра и номерами потомков:
+0 - TERMINAL_ZERO, 1 - TERMINAL_ONE, k + 2 - k-й узел таблицы.
+"""
+
+MAGIC = b"HXZD"
+VERSION = 1
+HEADER = struct.Struct("<4sBBIIII")
+EDGE = struct.Struct("<4H")
+NODE = struct.Struct("<III")
+TERMINALS = 2
+
+
+def dump_diagram(diagram: Diagram):
+    """
+    Принимает на вход диаграмму решений.
+    Возвращает ее запись в двоичном формате.
+    """
+    ids = {Node.TERMINAL_ZERO: 0, Node.TERMINAL_ONE: 1}
+    for node in diagram.nodes:
+        ids[node] = len(ids)
+    name = diagram.ordering.name.encode()
+    chunks = [
+        HEADER.pack(MAGIC, VERSION, len(name), diagram.ordering.width,
+                    len(diagram.edges), len(diagram.nodes),
+                    ids[diagram.root]),
+        name
+    ]
+    chunks.extend(EDGE.pack(*u, *v) for u, v in diagram.edges)
+    chunks.extend(NODE.pack(node.index, ids[node.zero_child],
+                            ids[node.one_child])
+                  for node in diagram.nodes)
+    return b"".join(chunks)
+
+
+def read_diagram(buffer):
+    """
+    Принимает на вход запись диаграммы в двоичном формате (объект,
+    поддерживающий буферный протокол).
+    Возвращает диаграмму, по которой можно перечислять, считать и
+    выбирать решения так же, как по построенной.
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Файл слишком мал для диаграммы решений.")
+    magic, version, length, width, edges_count, nodes_count, root = \
+        HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Файл не является диаграммой решений.")
+    offset = HEADER.size
+    size = offset + length + edges_count * EDGE.size + nodes_count * NODE.size
+    if len(buffer) < size:
+        raise ValueError("Диаграмма решений повреждена.")
+    name = bytes(buffer[offset:offset + length]).decode()
+    offset += length
+
+    view = memoryview(buffer)
+    edges = [[(i, j), (k, m)] for i, j, k, m in EDGE.iter_unpack(
+        view[offset:offset + edges_count * EDGE.size]
+    )]
+    offset += edges_count * EDGE.size
+    table = list(NODE.iter_unpack(
+        view[offset:offset + nodes_count * NODE.size]
+    ))
+    view.release()
+
+    nodes = [Node(edges[index], None, index) for index, _, _ in table]
+    by_id = [Node.TERMINAL_ZERO, Node.TERMINAL_ONE, *nodes]
+    for node, (_, zero, one) in zip(nodes, table):
+        node.add_children(by_id[zero], by_id[one])
+    return Diagram(by_id[root], nodes, Ordering(name, edges, width))
+
+
+def save_diagram(diagram: Diagram, path):
+    with open(path, "wb") as file:
+        file.write(dump_diagram(diagram))
+
+
+def load_diagram(path):
+    """
+    Загружает диаграмму из файла, отображая его в память.
+    """
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return read_diagram(data)
@@ -1,7 +1,17 @@
-from numberlink import HexLink, HexagonalField
-from algorithms.structures import Node, Bucket
-from algorithms.generator import generate_hexagonal_field
+from numberlink import HexLink, HexagonalField, generate_hexagonal_field
+from algorithms.structures import Node, Diagram
+from algorithms.ordering import order_edges
+from algorithms.frontier import compile_frontier
+from algorithms.presolve import presolve
+from algorithms.backtrack import solve_backtracking
+from algorithms.sat import find_backend, solve_sat
+from algorithms.regions import split_regions, are_pairs_inside
+from algorithms.serialization import dump_diagram, read_diagram
+import collections
+import contextlib
 import itertools
+import multiprocessing
+import random
 
 """
 Алгоритм был построены на основании статьи, которую можно скачать по ссылке:
@@ -9,160 +19,609 @@ http://www.mdpi.com/1999-4893/5/2/176/pdf
 Огромная благодарность авторам статьи.
 """
 
+# Способы решения: диаграмма всех решений, перебор с возвратом, внешний
+# SAT-решатель или выбор по количеству нужных решений
+ENGINES = ("auto", "zdd", "backtrack", "sat")
+BACKTRACK_LIMIT = 1
+# Уровни с меньшим количеством узлов раскрываются без пула процессов
+PARALLEL_LEVEL_SIZE = 10000
+# На сколько частей на процесс делится уровень при параллельном построении
+SHARDS_PER_JOB = 4
+# Области с меньшим количеством ребер строятся быстрее, чем запускается пул
+PARALLEL_REGION_SIZE = 50
 
-def get_right_path(edge, paths):
-    for path in paths:
-        if any(v in path for v in edge):
-            return path
-    return None
+# Фронтир, по которому процесс пула раскрывает узлы (см. expand_shard)
+worker_frontier = None
 
 
-def make_field_from_solution(field: HexLink, solution):
+def make_field_from_solution(field: HexLink, solution, targets=None):
+    """
+    Принимает на вход задачу Numberlink, ее решение и, если они уже
+    известны, цели задачи (см. HexLink.get_targets).
+    Возвращает поле, в котором клетки каждого пути заполнены его номером.
+    Каждый путь проходится один раз по списку смежности решения.
+    """
+    if targets is None:
+        targets = field.get_targets()
     result = HexagonalField(generate_hexagonal_field(field.size))
+    adjacent = collections.defaultdict(list)
+    for u, v in solution:
+        adjacent[u].append(v)
+        adjacent[v].append(u)
 
-    for pair in field.get_targets()["pairs"]:
+    for pair in targets["pairs"]:
         start, end = tuple(pair)
         number = field[start]
-        while start != end:
-            for edge in solution:
-                if start in edge:
-                    result[start] = number
-                    start = get_opposite(start, edge)
+        previous, current = None, start
+        while current != end:
+            result[current] = number
+            previous, current = current, next(
+                v for v in adjacent[current] if v != previous
+            )
         result[end] = number
     return result.field
 
 
-def make_solutions(root, path=None):
+def make_fields_from_solutions(field: HexLink, solutions):
+    """
+    Принимает на вход задачу Numberlink и итерируемый объект ее решений.
+    Генерирует поля решений, вычисляя цели задачи один раз.
+    """
+    targets = field.get_targets()
+    for solution in solutions:
+        yield make_field_from_solution(field, solution, targets)
+
+
+def make_solutions(root, as_masks=False):
     """
     Принимает на вход корень ZDD-диаграммы Numberlink.
-    Генерирует все решения задачи Numberlink.
+    Генерирует все решения задачи Numberlink: списки ребер или, если
+    as_masks истинно, битовые маски номеров ребер (см. decode_mask).
+    Обход выполняется без рекурсии, а текущий путь хранится в одном
+    списке, общем для всех решений с одинаковым префиксом.
+    """
+    path = []
+    stack = [(root, 0, None, 0)]
+    while stack:
+        node, depth, edge, mask = stack.pop()
+        del path[depth:]
+        if edge is not None and not as_masks:
+            path.append(edge)
+        if node is Node.TERMINAL_ONE:
+            yield mask if as_masks else list(path)
+        elif node is not Node.TERMINAL_ZERO:
+            depth = len(path)
+            one_mask = mask | 1 << node.index if as_masks else 0
+            # 1-потомок кладется первым, чтобы 0-ветвь обходилась раньше
+            stack.append((node.one_child, depth, node.edge, one_mask))
+            stack.append((node.zero_child, depth, None, mask))
+
+
+def combine_solutions(diagrams):
+    """
+    Принимает на вход диаграммы областей задачи (см. build_regions).
+    Генерирует решения задачи - сочетания решений областей, в которых
+    быстрее всего меняется решение последней области. Решения следующих
+    областей перечисляются заново для каждого решения предыдущей, поэтому
+    в памяти хранится только текущее сочетание.
+    """
+    if any(diagram.root is Node.TERMINAL_ZERO for diagram in diagrams):
+        return
+    if not diagrams:
+        yield []
+        return
+    first, *rest = diagrams
+    for solution in make_solutions(first.root):
+        for other in combine_solutions(rest):
+            yield solution + other
+
+
+def decode_mask(mask, edges):
     """
-    path = path or []
-    if root is Node.TERMINAL_ONE:
-        yield path
-    elif root is not Node.TERMINAL_ZERO:
-        yield from itertools.chain(
-                make_solutions(root.zero_child, path),
-                make_solutions(root.one_child, path + [root.edge])
-        )
+    Принимает на вход битовую маску решения и упорядоченный список ребер
+    диаграммы (Diagram.edges).
+    Возвращает список ребер решения.
+    """
+    return [edge for i, edge in enumerate(edges) if mask >> i & 1]
+
+
+def solve(instance: HexLink, limit=None, progress=None, engine="auto",
+          jobs=1):
+    """
+    Принимает на вход задачу Numberlink, максимальное количество решений,
+    необязательную функцию хода построения диаграммы (см. build_diagram),
+    способ решения (см. ENGINES) и количество процессов для построения
+    диаграмм (см. build_regions).
+    Возвращает генератор решений задачи (всех, если limit не указан).
+    """
+    engine = choose_engine(engine, limit)
+    if engine == "backtrack":
+        return solve_backtracking(instance, limit)
+    if engine == "sat":
+        return solve_sat(instance, limit)
+    diagrams = build_regions(instance, progress=progress, jobs=jobs)
+    return itertools.islice(combine_solutions(diagrams), limit)
 
 
-def get_path(path, node):
-    return path if node.arc == 0 else path + [node.edge]
+def choose_engine(engine, limit):
+    """
+    Принимает на вход способ решения и максимальное количество решений.
+    Возвращает "zdd", "backtrack" или "sat": в режиме "auto" перебор с
+    возвратом выбирается, если нужно не больше BACKTRACK_LIMIT решений.
+    SAT-решатель используется, только если он выбран явно.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный способ решения: {engine}")
+    if engine == "auto":
+        is_few = limit is not None and limit <= BACKTRACK_LIMIT
+        return "backtrack" if is_few else "zdd"
+    return engine
 
 
-def solve(instance: HexLink):
+def describe_engine(engine, limit):
+    """
+    Принимает на вход способ решения и максимальное количество решений.
+    Возвращает название способа, которым solve найдет решения, а для
+    SAT - вместе с названием найденного решателя.
+    """
+    engine = choose_engine(engine, limit)
+    if engine == "sat":
+        return f"sat ({find_backend().name})"
+    return engine
+
+
+def count_solutions(instance: HexLink, limit=None, jobs=1):
+    """
+    Принимает на вход задачу Numberlink, необязательную границу и
+    количество процессов (см. build_regions).
+    Возвращает количество ее решений, не перечисляя их. Если граница
+    указана, возвращает min(количество решений, limit).
+    Количество решений равно произведению количеств решений областей.
+    """
+    return count_combinations(build_regions(instance, jobs=jobs), limit)
+
+
+def count_combinations(diagrams, limit=None):
+    """
+    Принимает на вход диаграммы областей задачи (см. build_regions) и
+    необязательную границу.
+    Возвращает количество сочетаний решений областей или min(количество,
+    limit).
+    """
+    count = 1
+    for diagram in diagrams:
+        count *= count_paths(diagram, limit)[diagram.root]
+    return count if limit is None else min(count, limit)
+
+
+def has_unique_solution(instance: HexLink):
     """
     Принимает на вход задачу Numberlink.
-    Возвращает диаграмму решений задачи.
+    Проверяет, что у задачи ровно одно решение.
     """
-    graph = instance.make_graph()
-    targets = instance.get_targets()
-    vertices = Bucket(graph.vertices())
-    edges = graph.edges()
+    return count_solutions(instance, limit=2) == 1
 
-    root = Node(edges[0], {v: v for v in vertices.active}, 1)
 
-    def get_node(node_edge, mate, arc):
-        return Node(node_edge, mate, arc) if node_edge else Node.TERMINAL_ONE
+def count_edge_solutions(diagrams):
+    """
+    Принимает на вход диаграммы областей задачи (см. build_regions).
+    Возвращает словарь, сопоставляющий ребру (в виде frozenset) количество
+    решений задачи, в которых оно использовано.
+    """
+    counts = count_regions(diagrams)
+    totals = [region_counts[diagram.root]
+              for diagram, region_counts in zip(diagrams, counts)]
+    total = 1
+    for region_total in totals:
+        total *= region_total
+    result = collections.Counter()
+    if not total:
+        return result
+    for diagram, region_counts, region_total in zip(diagrams, counts, totals):
+        # Количество путей из корня в узел, умноженное на количество
+        # сочетаний решений остальных областей
+        above = {diagram.root: total // region_total}
+        for node in diagram.nodes:
+            through = above.pop(node, 0)
+            if not through:
+                continue
+            result[frozenset(node.edge)] += (through
+                                             * region_counts[node.one_child])
+            for child in node.children:
+                if child not in (Node.TERMINAL_ZERO, Node.TERMINAL_ONE):
+                    above[child] = above.get(child, 0) + through
+    return result
+
+
+def count_paths(diagram, limit=None):
+    """
+    Принимает на вход диаграмму решений и необязательную границу.
+    Возвращает словарь, сопоставляющий каждому узлу количество путей
+    из него в TERMINAL_ONE. Подсчет выполняется за один проход снизу вверх.
+    Если граница указана, количества ограничиваются ею сверху.
+    """
+    counts = {Node.TERMINAL_ZERO: 0, Node.TERMINAL_ONE: 1}
+    for node in reversed(diagram.nodes):
+        count = counts[node.zero_child] + counts[node.one_child]
+        counts[node] = count if limit is None else min(count, limit)
+    return counts
 
-    nodes = [root]
-    while edges:
-        edge = edges.pop(0)
-        next_edge = edges[0] if edges else None
-        update_vertices(vertices, edge, edges)
-        new_nodes = []
-        for node in nodes:
-            children = []
-            if is_zero_incompatible(node, targets, vertices):
-                children.append(Node.TERMINAL_ZERO)
-            else:
-                new_mate = update_domain(node.mate, vertices.active)
-                children.append(get_node(next_edge, new_mate, 0))
-            if is_one_incompatible(node, targets, vertices):
-                children.append(Node.TERMINAL_ZERO)
+
+def sample_solutions(instance: HexLink, k, seed=None, jobs=1):
+    """
+    Принимает на вход задачу Numberlink, количество решений, зерно
+    генератора случайных чисел и количество процессов (см. build_regions).
+    Возвращает список из k равновероятно выбранных (с повторениями) решений
+    или пустой список, если решений нет.
+    """
+    return sample_combinations(build_regions(instance, jobs=jobs), k, seed)
+
+
+def sample_combinations(diagrams, k, seed=None):
+    """
+    Принимает на вход диаграммы областей задачи, количество решений и
+    зерно.
+    Возвращает список из k равновероятно выбранных решений: решения
+    областей выбираются независимо друг от друга.
+    """
+    generator = random.Random(seed)
+    solutions = [[] for _ in range(k)]
+    for diagram in diagrams:
+        paths = sample_paths(diagram, k, generator.randrange(2 ** 63))
+        if not paths:
+            return []
+        for solution, path in zip(solutions, paths):
+            solution.extend(path)
+    return solutions
+
+
+def sample_paths(diagram, k, seed=None):
+    """
+    Принимает на вход диаграмму решений, количество решений и зерно.
+    Спускается от корня к TERMINAL_ONE k раз, на каждом узле выбирая дугу
+    с вероятностью, пропорциональной количеству путей через нее.
+    """
+    counts = count_paths(diagram)
+    if not counts[diagram.root]:
+        return []
+    generator = random.Random(seed)
+    solutions = []
+    for _ in range(k):
+        node = diagram.root
+        path = []
+        while node is not Node.TERMINAL_ONE:
+            if generator.randrange(counts[node]) < counts[node.one_child]:
+                path.append(node.edge)
+                node = node.one_child
             else:
-                new_mate = update_domain(update_mate(node), vertices.active)
-                children.append(get_node(next_edge, new_mate, 1))
-            new_nodes.extend(n for n in children if not is_terminal(n))
-            node.add_children(*children)
-        nodes = new_nodes
-    return make_solutions(root)
+                node = node.zero_child
+        solutions.append(path)
+    return solutions
 
 
-def is_zero_incompatible(node, targets, vertices):
-    filtered = (v for v in node.edge if v not in vertices.active)
+def solution_at(instance: HexLink, index, jobs=1):
+    """
+    Принимает на вход задачу Numberlink, номер решения и количество
+    процессов (см. build_regions).
+    Возвращает решение с этим номером в порядке solve.
+    """
+    diagrams = build_regions(instance, jobs=jobs)
+    return combination_at(diagrams, index, count_regions(diagrams))
 
-    def condition(v):
-        return (node.mate[v] == v
-                or v not in targets["vertices"] and node.mate[v] not in [0, v])
 
-    return any(condition(v) for v in filtered)
+def solutions_range(instance: HexLink, start, stop=None, jobs=1):
+    """
+    Принимает на вход задачу Numberlink, границы полуинтервала номеров и
+    количество процессов (см. build_regions).
+    Генерирует решения с номерами из [start, stop) в порядке solve. Если
+    stop не указан, генерирует решения до последнего.
+    """
+    diagrams = build_regions(instance, jobs=jobs)
+    counts = count_regions(diagrams)
+    total = 1
+    for diagram, region_counts in zip(diagrams, counts):
+        total *= region_counts[diagram.root]
+    stop = total if stop is None else min(stop, total)
+    for index in range(start, stop):
+        yield combination_at(diagrams, index, counts)
 
 
-def is_one_incompatible(node, targets, vertices):
-    union = targets["vertices"] | vertices.thrown
-    pair = {node.mate[v] for v in node.edge}
+def count_regions(diagrams):
+    return [count_paths(diagram) for diagram in diagrams]
 
-    def condition(v):
-        return (v in targets["vertices"] and node.mate[v] != v
-                or node.mate[v] in [0, get_opposite(v, node.edge)])
 
-    return (pair <= union and pair not in targets["pairs"]
-            or any(condition(v) for v in node.edge))
+def combination_at(diagrams, index, counts):
+    """
+    Принимает на вход диаграммы областей, номер решения и количества путей
+    узлов каждой диаграммы (см. count_regions).
+    Возвращает решение с этим номером в порядке combine_solutions: номер
+    раскладывается в смешанной системе счисления, цифры которой - номера
+    решений областей.
+    """
+    totals = [region_counts[diagram.root]
+              for diagram, region_counts in zip(diagrams, counts)]
+    total = 1
+    for count in totals:
+        total *= count
+    if not 0 <= index < total:
+        raise IndexError(f"Нет решения с номером {index}.")
+    indices = []
+    for count in reversed(totals):
+        index, digit = divmod(index, count)
+        indices.append(digit)
+    solution = []
+    for diagram, region_counts, digit in zip(diagrams, counts,
+                                             reversed(indices)):
+        solution.extend(path_at(diagram, digit, region_counts))
+    return solution
+
+
+def path_at(diagram, index, counts):
+    """
+    Принимает на вход диаграмму решений, номер решения и количества путей
+    узлов (см. count_paths).
+    Спускается от корня, сравнивая номер с количеством путей 0-потомка.
+    """
+    if not 0 <= index < counts[diagram.root]:
+        raise IndexError(f"Нет решения с номером {index}.")
+    node = diagram.root
+    path = []
+    while node is not Node.TERMINAL_ONE:
+        if index < counts[node.zero_child]:
+            node = node.zero_child
+        else:
+            index -= counts[node.zero_child]
+            path.append(node.edge)
+            node = node.one_child
+    return path
 
 
-def is_terminal(node):
-    return node in [Node.TERMINAL_ZERO, Node.TERMINAL_ONE]
+def build_regions(instance: HexLink, strategy=None, progress=None, jobs=1):
+    """
+    Принимает на вход задачу Numberlink, стратегию обхода ребер, функцию
+    хода построения (см. build_diagram) и количество процессов.
+    Возвращает список диаграмм решений независимых областей задачи (см.
+    algorithms.regions), а для противоречивой задачи - одну пустую.
+    """
+    reduction = presolve(instance)
+    regions = split_regions(reduction.edges)
+    if not reduction.feasible or len(regions) < 2:
+        return [build_diagram(instance, strategy, progress, jobs=jobs)]
+    if not are_pairs_inside(regions, instance.get_targets()):
+        ordering = order_edges(instance, strategy, reduction.edges)
+        return [Diagram(Node.TERMINAL_ZERO, [], ordering, reduction)]
+
+    total = len(reduction.edges)
+    diagrams = []
+    large = sum(1 for region in regions
+                if len(region) >= PARALLEL_REGION_SIZE)
+    # Пул областей окупается, только если больших областей хотя бы две;
+    # иначе области строятся по очереди, а уровни - в пуле build_diagram
+    if jobs == 1 or large < 2:
+        for region in regions:
+            report = None
+            if progress is not None:
+                # Номер уровня среди уровней всех областей
+                offset = sum(len(diagram.edges) for diagram in diagrams)
+                report = (lambda level, _, offset=offset:
+                          progress(offset + level, total))
+            diagrams.append(build_diagram(instance, strategy, report, region,
+                                          jobs))
+        return diagrams
+    # Процессы пула демонические и не могут создать свой пул, поэтому
+    # уровни в них раскрываются последовательно
+    tasks = ((instance.field, strategy, region) for region in regions)
+    with multiprocessing.Pool(jobs) as pool:
+        for data in pool.imap(build_region, tasks):
+            diagrams.append(read_diagram(data))
+            if progress is not None:
+                progress(sum(len(diagram.edges) for diagram in diagrams),
+                         total)
+    return diagrams
+
+
+def build_region(task):
+    field, strategy, edges = task
+    return dump_diagram(build_diagram(HexLink(field), strategy, edges=edges))
+
+
+def build_diagram(instance: HexLink, strategy=None, progress=None,
+                  edges=None, jobs=1):
+    """
+    Принимает на вход задачу Numberlink, стратегию обхода ребер (см.
+    algorithms.ordering), функцию progress(уровень, всего уровней), ребра
+    (по умолчанию - все ребра поля) и количество процессов.
+    Возвращает сокращенную ZDD-диаграмму решений задачи.
+    """
+    reduction = presolve(instance, edges)
+    ordering = order_edges(instance, strategy, reduction.edges)
+    if not reduction.feasible:
+        return Diagram(Node.TERMINAL_ZERO, [], ordering, reduction)
+    frontier = compile_frontier(ordering.edges, instance.get_targets())
 
+    root = Node(ordering.edges[0], (), 0)
 
-def is_not_terminal(node):
-    return not is_terminal(node)
+    levels = []
+    nodes = [root]
+    with contextlib.ExitStack() as stack:
+        # Уровни от PARALLEL_LEVEL_SIZE узлов раскрываются в пуле (см.
+        # expand_level), который создается на первом таком уровне
+        pool = None
+        for level in frontier.levels:
+            levels.append(nodes)
+            is_last = level.index + 1 == len(frontier.levels)
+            next_edge = None if is_last else ordering.edges[level.index + 1]
+            # У обязательных ребер (см. algorithms.presolve) нет 0-ветви
+            is_fixed = tuple(level.edge) in reduction.fixed
+            # Узлы уровня с одинаковой функцией mate - кортежем значений на
+            # фронтире (см. algorithms.frontier) - склеиваются в один
+            unique = {}
+
+            def get_node(mate):
+                if mate is None:
+                    return Node.TERMINAL_ZERO
+                if next_edge is None:
+                    return Node.TERMINAL_ONE
+                if mate not in unique:
+                    unique[mate] = Node(next_edge, mate, level.index + 1)
+                return unique[mate]
+
+            if jobs > 1 and len(nodes) >= PARALLEL_LEVEL_SIZE and pool is None:
+                pool = stack.enter_context(multiprocessing.Pool(
+                    jobs, initializer=set_worker_frontier,
+                    initargs=(frontier,)
+                ))
+            if pool is None or len(nodes) < PARALLEL_LEVEL_SIZE:
+                expanded = (expand_node(node.mate, level, frontier, is_fixed)
+                            for node in nodes)
+            else:
+                expanded = expand_level(pool, jobs, nodes, level.index,
+                                        is_fixed)
+            for node, (zero_mate, one_mate) in zip(nodes, expanded):
+                node.add_children(get_node(zero_mate), get_node(one_mate))
+            nodes = list(unique.values())
+            if progress is not None:
+                # progress может прервать построение исключением
+                progress(level.index + 1, len(frontier.levels))
+            if not nodes:
+                # Все ветви уже оборваны: решений нет
+                break
+    return reduce_diagram(root, levels, ordering, reduction)
+
+
+def expand_node(mate, level, frontier, is_fixed):
+    """
+    Принимает на вход функцию mate узла, уровень и фронтир диаграммы и
+    признак обязательного ребра.
+    Возвращает функции mate 0- и 1-потомка узла; None означает, что
+    потомок - TERMINAL_ZERO.
+    """
+    state = mate + level.entering
+    zero_mate = one_mate = None
+    if not (is_fixed or is_zero_incompatible(state, level)):
+        zero_mate = update_domain(state, level.keep)
+    if not is_one_incompatible(state, level, frontier):
+        one_mate = update_domain(update_mate(state, level), level.keep)
+    return zero_mate, one_mate
 
 
-def update_domain(mate, domain):
+def expand_level(pool, jobs, nodes, index, is_fixed):
+    """
+    Раскрывает узлы уровня index в процессах пула. Узлы делятся на части,
+    каждая часть склеивает потомков с одинаковой функцией mate у себя и
+    возвращает их один раз вместе с номерами потомков каждого узла.
+    Генерирует пары функций mate потомков в порядке узлов, поэтому
+    диаграмма получается такой же, как при построении в одном процессе.
+    """
+    size = -(-len(nodes) // (jobs * SHARDS_PER_JOB))
+    tasks = ((index, is_fixed, [node.mate for node in nodes[i:i + size]])
+             for i in range(0, len(nodes), size))
+    for mates, children in pool.imap(expand_shard, tasks):
+        for zero, one in children:
+            yield (None if zero < 0 else mates[zero],
+                   None if one < 0 else mates[one])
+
+
+def set_worker_frontier(frontier):
+    global worker_frontier
+    worker_frontier = frontier
+
+
+def expand_shard(task):
+    index, is_fixed, mates = task
+    level = worker_frontier.levels[index]
+    ids = {}
+    children = []
+    for mate in mates:
+        zero_mate, one_mate = expand_node(mate, level, worker_frontier,
+                                          is_fixed)
+        children.append((
+            -1 if zero_mate is None else ids.setdefault(zero_mate, len(ids)),
+            -1 if one_mate is None else ids.setdefault(one_mate, len(ids))
+        ))
+    return list(ids), children
+
+
+def reduce_diagram(root, levels, ordering, reduction=None):
     """
-    Принимает на вход вспомогательную функцию и вершины.
-    Возвращает ограничение функции на данные вершины.
+    Принимает на вход корень диаграммы, ее узлы, разбитые по уровням, и
+    порядок обхода ребер.
+    Снизу вверх применяет правила сокращения ZDD: узел, 1-дуга которого
+    ведет в TERMINAL_ZERO, заменяется своим 0-потомком, а узлы уровня
+    с одинаковыми потомками склеиваются.
+    Возвращает сокращенную диаграмму.
     """
-    return {v: mate[v] for v in domain}
+    replacement = {}
+    reduced = []
+    for level in reversed(levels):
+        unique = {}
+        kept = []
+        for node in level:
+            zero, one = (replacement.get(child, child)
+                         for child in node.children)
+            if one is Node.TERMINAL_ZERO:
+                replacement[node] = zero
+            elif (zero, one) in unique:
+                replacement[node] = unique[zero, one]
+            else:
+                node.add_children(zero, one)
+                # После построения функция mate больше не нужна
+                node.mate = None
+                unique[zero, one] = node
+                kept.append(node)
+        reduced.append(kept)
+    nodes = list(itertools.chain(*reversed(reduced)))
+    return Diagram(replacement.get(root, root), nodes, ordering, reduction)
 
 
-def update_mate(parent):
+def is_zero_incompatible(state, level):
     """
-    Принимает на вход узел родителя.
-    Возвращает словарь-функцию узла, определенную на вершинах родителя.
+    Проверяет, что без ребра уровня одна из покидающих фронтир вершин
+    останется изолированной или станет концом пути, не являясь концом пары.
     """
-    mate = {}
+    return any(state[i] == v or not is_target and state[i] not in (0, v)
+               for i, v, is_target in level.leaving)
 
-    for vertex in parent.mate:
-        if vertex in parent.edge and parent.mate[vertex] != vertex:
-            mate[vertex] = 0
-        elif parent.mate[vertex] in parent.edge:
-            opposite = get_opposite(parent.mate[vertex], parent.edge)
-            mate[vertex] = parent.mate[opposite]
-        else:
-            mate[vertex] = parent.mate[vertex]
 
-    return mate
+def is_one_incompatible(state, level, frontier):
+    """
+    Проверяет, что ребро уровня нельзя добавить: у одного из концов уже
+    нет свободной степени, образуется цикл или соединяются концы путей,
+    которые не являются парой.
+    """
+    (u, v), (i, j) = level.pair, level.ends
+    u_mate, v_mate = state[i], state[j]
+    if (frontier.is_target[u] and u_mate != u or u_mate in (0, v)
+            or frontier.is_target[v] and v_mate != v or v_mate in (0, u)):
+        return True
+    return (frontier.is_closed(u_mate, level.index)
+            and frontier.is_closed(v_mate, level.index)
+            and frontier.partner[u_mate] != v_mate)
 
 
-def update_vertices(vertices, edge, edges):
+def update_domain(mate, positions):
     """
-    Принимает на вход ребро, словарь вершин, которые делятся на
-    активные/неактивные, список других ребер.
-    Перемещает в неактивные те вершины, которые инцидентны только ребру
-    edge и никакому другому ребру из edges.
+    Принимает на вход вспомогательную функцию и позиции вершин нового
+    домена в старом.
+    Возвращает ограничение функции на новый домен.
     """
-    vertices_in_edges = set(itertools.chain(*edges))
-    for vertex in (v for v in edge if v not in vertices_in_edges):
-        vertices.throw(vertex)
+    return tuple(mate[i] for i in positions)
 
 
-def get_opposite(x, pair):
+def update_mate(state, level):
     """
-    Принимает на вход элемент и список/tuple из двух элементов.
-    Возвращает парный элемент для x из pair, если x находится в списке,
-    иначе возвращает None.
+    Принимает на вход состояние уровня и таблицу уровня.
+    Возвращает вспомогательную функцию после добавления ребра уровня,
+    определенную на тех же вершинах.
     """
-    return pair[0] if x == pair[1] else pair[1] if x == pair[0] else None
+    (u, v), (i, j) = level.pair, level.ends
+    u_mate, v_mate = state[i], state[j]
+    mate = list(state)
+    mate[i] = v_mate if u_mate == u else 0
+    mate[j] = u_mate if v_mate == v else 0
+    # Другие концы путей, которые заканчивались в u и v
+    if u_mate != u and u_mate in level.positions:
+        mate[level.positions[u_mate]] = v_mate
+    if v_mate != v and v_mate in level.positions:
+        mate[level.positions[v_mate]] = u_mate
+    return tuple(mate)
@@ -1,21 +1,13 @@
-class Bucket:
-    def __init__(self, iterable):
-        self.active = set(iterable)
-        self.thrown = set()
-
-    def throw(self, item):
-        self.active.remove(item)
-        self.thrown.add(item)
-
-
 class Node:
+    __slots__ = ("edge", "mate", "index", "zero_child", "one_child")
+
     TERMINAL_ZERO = None
     TERMINAL_ONE = None
 
-    def __init__(self, edge, mate, arc_name):
+    def __init__(self, edge, mate, index=None):
         self.edge = edge
         self.mate = mate
-        self.arc = arc_name
+        self.index = index
         self.zero_child = None
         self.one_child = None
 
@@ -28,5 +20,18 @@ class Node:
         return self.zero_child, self.one_child
 
 
-Node.TERMINAL_ONE = Node(None, None, 1)
-Node.TERMINAL_ZERO = Node(None, None, 0)
+Node.TERMINAL_ONE = Node(None, None)
+Node.TERMINAL_ZERO = Node(None, None)
+
+
+class Diagram:
+    def __init__(self, root, nodes, ordering, reduction=None):
+        self.root = root
+        self.nodes = nodes
+        self.ordering = ordering
+        # Результат предварительной обработки (см. algorithms.presolve)
+        self.reduction = reduction
+
+    @property
+    def edges(self):
+        return self.ordering.edges
@@ -1,34 +1,100 @@
-from numberlink import HexLink
-from algorithms import solve, generate_field
+from numberlink import HexLink, format_field, parse_fields
+from algorithms import generate_field
+from algorithms.cache import SolutionCache
+from algorithms.solver import ENGINES
+from algorithms.generator import generate_fields
+from algorithms.ordering import get_orderings
+from algorithms.presolve import presolve
+from corpus import CorpusReader, is_corpus
 import itertools
 import argparse
+import contextlib
+import io
+import multiprocessing
+import random
 import sys
 
+# Коды возврата режима --unique
+EXIT_UNIQUE = 0
+EXIT_NO_SOLUTIONS = 1
+EXIT_MANY_SOLUTIONS = 2
+
+# Кэш решений процесса, создается при первом обращении (см. get_cache)
+cache = None
+
 
 class ConsoleHexLink:
     LEFT_SYMBOL = " \\"
     RIGHT_SYMBOL = "/ "
 
-    def __init__(self, field, solutions_amount=None):
+    def __init__(self, field, solutions_amount=None, offset=0,
+                 cache=None, engine="auto", jobs=1):
         if solutions_amount is not None and solutions_amount < 0:
             raise ValueError("Количество решений должно быть неотрицательным.")
+        if offset < 0:
+            raise ValueError("Номер решения должен быть неотрицательным.")
+        if jobs < 1:
+            raise ValueError("Количество процессов должно быть положительным.")
         self.game = HexLink(field)
         self.amount = solutions_amount
+        self.offset = offset
+        self.cache = SolutionCache() if cache is None else cache
+        self.engine = engine
+        self.jobs = jobs
 
     def show_game(self):
         print(self._get_solution_string(self.game.make_graph().edges()))
 
     def show_solutions(self):
-        solutions = solve(self.game)
+        if self.offset:
+            stop = None if self.amount is None else self.offset + self.amount
+            solutions = self.cache.solutions_range(self.game, self.offset,
+                                                   stop, self.jobs)
+        else:
+            solutions = self.cache.solve(self.game, self.amount,
+                                         engine=self.engine, jobs=self.jobs)
         founded = False
-        for i, solution in enumerate(solutions):
+        for solution in solutions:
             founded = True
-            if self.amount is not None and i + 1 > self.amount:
-                break
             print(self._get_solution_string(solution))
         if not founded:
             print("Решений нет.")
 
+    def show_engine(self):
+        engine = self.cache.describe_engine(self.game, self.amount,
+                                            self.engine, self.offset)
+        print(f"Способ решения: {engine}")
+
+    def show_count(self):
+        print(self.cache.count_solutions(self.game, jobs=self.jobs))
+
+    def show_uniqueness(self):
+        """
+        Выводит, сколько решений у задачи: ни одного, одно или несколько.
+        Возвращает соответствующий код возврата.
+        """
+        count = self.cache.count_solutions(self.game, limit=2,
+                                           jobs=self.jobs)
+        if count == 1:
+            print("Решение единственно.")
+            return EXIT_UNIQUE
+        if count > 1:
+            print("Решений несколько.")
+            return EXIT_MANY_SOLUTIONS
+        print("Решений нет.")
+        return EXIT_NO_SOLUTIONS
+
+    def show_orderings(self):
+        for ordering in get_orderings(self.game):
+            print(f"{ordering.name}: {ordering.width}")
+
+    def show_presolve(self):
+        reduction = presolve(self.game)
+        print(f"Ребер: {reduction.total}, обязательных: "
+              f"{len(reduction.fixed)}, удалено: {len(reduction.removed)}")
+        if not reduction.feasible:
+            print("Противоречие найдено до построения диаграммы.")
+
     def _get_solution_string(self, solution):
         solution = {frozenset(pair) for pair in solution}
 
@@ -97,11 +163,82 @@ def create_parser():
                         nargs='?',
                         type=int,
                         action="store")
+    parser.add_argument("-o", "--offset",
+                        help="the number of solutions to skip",
+                        type=int,
+                        default=0,
+                        action="store")
     parser.add_argument("-g", "--generate",
                         nargs=1,
                         type=int,
                         help="generate instance of Numberlink",
                         action="store")
+    parser.add_argument("--instances",
+                        type=int,
+                        help="with --generate, print this many instances "
+                             "without solving them",
+                        action="store")
+    parser.add_argument("-j", "--jobs",
+                        type=int,
+                        default=1,
+                        help="the number of worker processes; for a single "
+                             "instance, the processes build the diagram",
+                        action="store")
+    parser.add_argument("--seed",
+                        type=int,
+                        help="the seed of the random number generator",
+                        action="store")
+    parser.add_argument("-b", "--batch",
+                        nargs="?",
+                        const="-",
+                        help="solve every instance from the file (or stdin "
+                             "if the file is omitted); instances are "
+                             "separated by empty lines, a binary corpus "
+                             "made by corpus.py is also accepted",
+                        action="store")
+    parser.add_argument("--unordered",
+                        help="with --batch or --instances, print results as "
+                             "they complete",
+                        action="store_true")
+    parser.add_argument("--output",
+                        help="the file to write generated instances or "
+                             "batch results to",
+                        action="store")
+    parser.add_argument("--engine",
+                        choices=ENGINES,
+                        default="auto",
+                        help="how to find solutions: build the diagram of "
+                             "all solutions (zdd), search for the first ones "
+                             "(backtrack) or choose by the number of "
+                             "solutions requested (auto, the default). The "
+                             "sat engine runs pycosat or a DIMACS solver "
+                             "such as minisat found in PATH",
+                        action="store")
+    parser.add_argument("--report-engine",
+                        help="print which engine, and for sat which solver, "
+                             "produced the solutions; \"cache (zdd)\" if "
+                             "they were stored in the cache",
+                        action="store_true")
+    parser.add_argument("--cache",
+                        help="the sqlite file to keep solved instances in "
+                             "between runs and processes",
+                        action="store")
+    parser.add_argument("-c", "--count",
+                        help="print the number of solutions",
+                        action="store_true")
+    parser.add_argument("-u", "--unique",
+                        help="check that the solution is unique; exit code "
+                             "is 0 if it is, 1 if there are no solutions "
+                             "and 2 if there are several. With --generate, "
+                             "generate a uniquely solvable instance",
+                        action="store_true")
+    parser.add_argument("--orderings",
+                        help="show the frontier width of each edge ordering",
+                        action="store_true")
+    parser.add_argument("--presolve",
+                        help="show how many edges the presolve stage fixed "
+                             "and removed",
+                        action="store_true")
     parser.add_argument("--show",
                         help="show the initial field",
                         action="store_true")
@@ -118,18 +255,131 @@ def enter_field():
     return field
 
 
+def generate_instances(args):
+    """
+    Генерирует args.instances задач в args.jobs процессах и выводит их
+    в формате ввода, разделяя пустыми строками, в порядке номеров или,
+    если указан --unordered, по мере готовности.
+    """
+    if args.instances < 0:
+        raise ValueError("Количество задач должно быть неотрицательным.")
+    if args.jobs < 1:
+        raise ValueError("Количество процессов должно быть положительным.")
+    fields = generate_fields(args.generate[0], args.instances, args.seed,
+                             args.jobs, args.unique, not args.unordered)
+    with open_output(args.output) as stream:
+        for _, field in fields:
+            stream.write(format_field(field) + "\n\n")
+            stream.flush()
+
+
+def solve_batch(args):
+    """
+    Решает все задачи из файла args.batch (текстового, корпуса задач или
+    стандартного ввода) в args.jobs процессах. Результат каждой задачи
+    выводится под заголовком с ее номером в порядке ввода или, если указан
+    --unordered, по мере готовности. Ошибки в задаче не прерывают обработку
+    остальных.
+    """
+    if args.jobs < 1:
+        raise ValueError("Количество процессов должно быть положительным.")
+    with contextlib.ExitStack() as stack:
+        if args.batch == "-":
+            fields = parse_fields(sys.stdin)
+        elif is_corpus(args.batch):
+            fields = stack.enter_context(CorpusReader(args.batch))
+        else:
+            fields = parse_fields(stack.enter_context(open(args.batch)))
+        stream = stack.enter_context(open_output(args.output))
+        tasks = ((i, field, args) for i, field in enumerate(fields))
+        if args.jobs == 1:
+            results = map(solve_batch_task, tasks)
+        else:
+            pool = stack.enter_context(multiprocessing.Pool(args.jobs))
+            mapper = pool.imap_unordered if args.unordered else pool.imap
+            results = mapper(solve_batch_task, tasks)
+        for index, text in results:
+            stream.write(f"Задача {index + 1}:\n{text}\n")
+            stream.flush()
+
+
+def solve_batch_task(task):
+    index, field, args = task
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            play(field, args)
+        except ValueError as err:
+            print(err.args[0])
+        except Exception as err:
+            # Ошибка в одной задаче не должна прерывать обработку остальных
+            print(f"Ошибка: {type(err).__name__}: {err}")
+    return index, output.getvalue()
+
+
+@contextlib.contextmanager
+def open_output(path):
+    if path:
+        with open(path, "w") as stream:
+            yield stream
+    else:
+        yield sys.stdout
+
+
+def get_cache(path):
+    """
+    Возвращает кэш решений текущего процесса. Если указан путь, записи
+    кэша сохраняются в базе sqlite и доступны другим процессам и запускам.
+    """
+    global cache
+    if cache is None:
+        cache = SolutionCache(path=path)
+    return cache
+
+
+def play(field, args):
+    """
+    Выполняет над задачей действия, указанные в аргументах командной
+    строки. Возвращает код возврата.
+    """
+    # В пакетном режиме процессы заняты задачами, поэтому каждая задача
+    # решается в одном процессе
+    jobs = 1 if args.batch is not None else args.jobs
+    game = ConsoleHexLink(field, args.number, args.offset,
+                          get_cache(args.cache), args.engine, jobs)
+    if args.show:
+        game.show_game()
+    if args.orderings:
+        game.show_orderings()
+    if args.presolve:
+        game.show_presolve()
+    if args.unique:
+        return game.show_uniqueness()
+    if args.count:
+        game.show_count()
+    elif args.number is None or args.number > 0:
+        if args.report_engine:
+            game.show_engine()
+        game.show_solutions()
+    return 0
+
+
 def main():
     args = create_parser().parse_args()
     try:
+        if args.generate and args.instances is not None:
+            generate_instances(args)
+            return
+        if args.batch is not None:
+            solve_batch(args)
+            return
+        if args.seed is not None:
+            random.seed(args.seed)
         if args.generate:
-            field = generate_field(args.generate[0])
+            field = generate_field(args.generate[0], unique=args.unique)
         else:
             field = enter_field()
-        game = ConsoleHexLink(field, args.number)
-        if args.show:
-            game.show_game()
-        if args.number is None or args.number > 0:
-            game.show_solutions()
+        sys.exit(play(field, args))
     except ValueError as err:
         print(err.args[0])
         sys.exit(-1)
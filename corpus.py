@@ -0,0 +1,195 @@
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import sys
+from numberlink import (HexagonalField, format_field, parse_fields,
+                        generate_hexagonal_field)
+
+"""
+Двоичный формат корпуса задач Numberlink одного размера.
+Заголовок: сигнатура, версия формата, размер поля и количество задач.
+Далее задачи записаны подряд: клетки каждой задачи построчно, по одному
+байту на клетку, поэтому задача с номером i читается без разбора
+предыдущих.
+"""
+
+MAGIC = b"HEXL"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")
+MAX_CELL = 255
+
+
+class CorpusWriter:
+    def __init__(self, path, size):
+        self.size = size
+        self.lengths = [len(level) for level in generate_hexagonal_field(size)]
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, size, 0, 0))
+
+    def write(self, field):
+        """
+        Добавляет в корпус задачу того же размера, что и корпус.
+        """
+        field = HexagonalField(field).field
+        if len(field) != self.size:
+            raise ValueError(
+                f"Размер задачи {len(field)} не совпадает с размером "
+                f"корпуса {self.size}."
+            )
+        cells = list(itertools.chain(*field))
+        if any(not 0 <= cell <= MAX_CELL for cell in cells):
+            raise ValueError(f"Числа в корпусе не могут превышать {MAX_CELL}.")
+        self.file.write(bytes(cells))
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.size, 0, self.count))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CorpusReader:
+    def __init__(self, path):
+        """
+        Открывает корпус задач. Если файл не является корпусом, имеет
+        другую версию формата или его длина не совпадает с указанной в
+        заголовке, выбрасывает ValueError.
+        """
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size or not header.startswith(MAGIC):
+                raise ValueError(f"Файл {path} не является корпусом задач.")
+            _, version, self.size, _, self.count = HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError(f"Версия корпуса {path} ({version}) не "
+                                 f"поддерживается.")
+            if self.size % 2 == 0:
+                raise ValueError(f"Корпус {path} поврежден: размер поля "
+                                 f"{self.size} должен быть нечетным.")
+            self.lengths = [len(level) for level in generate_hexagonal_field(
+                self.size
+            )]
+            self.width = sum(self.lengths)
+            expected = HEADER.size + self.count * self.width
+            actual = os.fstat(file.fileno()).st_size
+            if actual != expected:
+                raise ValueError(f"Корпус {path} поврежден: ожидалось "
+                                 f"{expected} байт, в файле {actual}.")
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """
+        Возвращает задачу с номером index в виде списка уровней.
+        """
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"Нет задачи с номером {index}.")
+        start = HEADER.size + index * self.width
+        cells = iter(self.data[start:start + self.width])
+        return [list(itertools.islice(cells, length))
+                for length in self.lengths]
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def is_corpus(path):
+    """
+    Проверяет по сигнатуре, что файл является корпусом задач.
+    """
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def text_to_corpus(lines, path):
+    """
+    Принимает на вход строки задач в формате ввода cnumberlink.py и путь к
+    корпусу. Размер корпуса определяется по первой задаче.
+    Возвращает количество записанных задач.
+    """
+    fields = parse_fields(lines)
+    first = next(fields, None)
+    if first is None:
+        raise ValueError("Не обнаружено ни одной задачи.")
+    with CorpusWriter(path, len(first)) as writer:
+        for field in itertools.chain([first], fields):
+            writer.write(field)
+        return writer.count
+
+
+def corpus_to_text(path, stream):
+    """
+    Записывает задачи корпуса в поток в формате ввода cnumberlink.py.
+    Возвращает количество записанных задач.
+    """
+    with CorpusReader(path) as reader:
+        for field in reader:
+            stream.write(format_field(field) + "\n\n")
+        return len(reader)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="convert Numberlink instances between the text format "
+                    "of cnumberlink.py and the binary corpus format"
+    )
+    parser.add_argument("command",
+                        choices=["pack", "unpack"],
+                        help="pack: text to corpus, unpack: corpus to text")
+    parser.add_argument("source",
+                        help="the input file ('-' for stdin when packing)")
+    parser.add_argument("target",
+                        nargs="?",
+                        help="the output file (stdout when unpacking if "
+                             "omitted)")
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+    try:
+        if args.command == "pack":
+            if args.target is None:
+                raise ValueError("Не указан файл корпуса.")
+            if args.source == "-":
+                text_to_corpus(sys.stdin, args.target)
+            else:
+                with open(args.source) as source:
+                    text_to_corpus(source, args.target)
+        elif args.target is None:
+            corpus_to_text(args.source, sys.stdout)
+        else:
+            with open(args.target, "w") as target:
+                corpus_to_text(args.source, target)
+    except ValueError as err:
+        print(err.args[0])
+        sys.exit(-1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import functools
 from PyQt5.QtWidgets import QPushButton, QWidget, QVBoxLayout, QHBoxLayout
 from PyQt5.QtCore import Qt
-from algorithms.solver import make_field_from_solution, solve
-from numberlink import HexagonalField, HexLink
+from algorithms.cache import SolutionCache
+from algorithms.solver import (make_field_from_solution,
+                               make_fields_from_solutions,
+                               sample_combinations)
+from gui.worker import FirstSolutionWorker, SolveWorker
+from numberlink import HexagonalField, HexLink, PathState
 
 
 class CellButton(QPushButton):
@@ -92,14 +96,26 @@ class HexBoard(QWidget):
 
 
 class GameBoard(HexBoard):
+    # Кэш решений, общий для всех игр. Обращаются к нему только потоки
+    # поиска (см. gui.worker), чтобы не задерживать интерфейс
+    cache = SolutionCache()
+
     def __init__(self, field, parent):
         super().__init__(field, parent)
         self.field = HexLink(field)
+        self.game = HexLink(field)
         self.targets = self.field.get_targets()["vertices"]
-        self.solutions = [
-            HexagonalField(make_field_from_solution(self.field, solution))
-            for solution in solve(self.field)
-        ]
+        self.state = PathState(self.game)
+        # Диаграммы областей задачи и количество решений, None - пока
+        # поиск не завершен
+        self.diagrams = None
+        self.solutions_count = None
+        self.is_cancelled = False
+        self.worker = None
+        # Решение, найденное перебором до построения диаграмм: список из
+        # одного поля, пустой, если решений нет, или None, пока не найдено
+        self.first_solutions = None
+        self.first_worker = None
         self.when_solved = lambda: None
 
         for cell in self.cells:
@@ -109,21 +125,96 @@ class GameBoard(HexBoard):
     def cell_click(self, cell):
         if cell.position not in self.targets:
             super().cell_click(cell)
+            self.state.set_cell(cell.position, cell.number)
             if self.check_solution():
                 self.when_solved()
 
+    def create_worker(self):
+        """
+        Создает поток поиска решений (см. SolveWorker), в том числе
+        повторного после отмены. Возвращает поток, который запускает
+        вызывающий, подключив свои сигналы.
+        """
+        self.diagrams = None
+        self.solutions_count = None
+        self.is_cancelled = False
+        self.worker = SolveWorker(self.game, self.cache, self)
+        self.worker.solved.connect(self.set_solutions)
+        self.worker.cancelled.connect(self.set_cancelled)
+        return self.worker
+
+    def create_first_worker(self):
+        """
+        Создает поток поиска одного решения (см. FirstSolutionWorker).
+        Возвращает поток, который запускает вызывающий, подключив свои
+        сигналы.
+        """
+        self.first_worker = FirstSolutionWorker(self.game, self.cache,
+                                                self)
+        self.first_worker.found.connect(self.set_first_solution)
+        return self.first_worker
+
+    def cancel_solving(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def stop_solving(self):
+        """
+        Прерывает поиск решений и дожидается завершения потоков.
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        if self.first_worker is not None:
+            self.first_worker.wait()
+
+    def set_solutions(self, diagrams, count):
+        self.diagrams = diagrams
+        self.solutions_count = count
+
+    def set_cancelled(self):
+        self.is_cancelled = True
+
+    def set_first_solution(self, solution):
+        self.first_solutions = []
+        if solution is not None:
+            field = make_field_from_solution(self.game, solution)
+            self.first_solutions.append(HexagonalField(field))
+
+    def sample_solutions(self, k):
+        """
+        Возвращает k случайных решений задачи в виде полей или пустой
+        список, если решений нет или поиск еще не завершен (см.
+        is_solving). Решения выбираются из диаграмм, только когда они
+        нужны, поэтому поток интерфейса не ищет решения сам.
+        """
+        if self.diagrams is None:
+            return []
+        solutions = sample_combinations(self.diagrams, k)
+        return [HexagonalField(field) for field in
+                make_fields_from_solutions(self.game, solutions)]
+
+    def is_solving(self):
+        """
+        Проверяет, что поиск решений идет: диаграммы еще не получены, и
+        поиск не отменен.
+        """
+        return self.diagrams is None and not self.is_cancelled
+
     def check_solution(self):
-        return any(self.field == solution for solution in self.solutions)
+        return self.state.is_solved()
 
     def clear(self):
         for cell in self.cells:
             if cell.position not in self.targets:
                 cell.set_number(0)
                 self.field[cell.position] = 0
+                self.state.set_cell(cell.position, 0)
 
     def set_field(self, field):
         for i, level in enumerate(field):
             for j, cell in enumerate(level):
                 self.field[i, j] = cell
+                self.state.set_cell((i, j), cell)
         for cell in self.cells:
             cell.set_number(self.field[cell.position])
@@ -1,8 +1,7 @@
-import random
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
                              QMessageBox, QDialog, QLabel, QMainWindow,
-                             QStackedWidget)
+                             QStackedWidget, QProgressBar)
 from algorithms.generator import generate_hexagonal_field, generate_field
 from gui.board import HexBoard, GameBoard
 from numberlink import HexLink
@@ -101,11 +100,18 @@ class GameWindow(QWidget):
     def __init__(self, field, parent):
         super().__init__(parent)
         self.board = GameBoard(field, self)
+        self.solve_button = QPushButton("Решение", self)
+        self.cancel_button = QPushButton("Отменить поиск", self)
+        self.retry_button = QPushButton("Повторить поиск", self)
+        self.status = QLabel(self)
+        self.progress = QProgressBar(self)
         self.init_ui()
+        self.start_solving()
 
     def init_ui(self):
-        solve_button = QPushButton("Решение", self)
-        solve_button.clicked.connect(self.solve)
+        self.solve_button.clicked.connect(self.solve)
+        self.cancel_button.clicked.connect(self.board.cancel_solving)
+        self.retry_button.clicked.connect(self.start_solving)
         menu_button = QPushButton("Меню", self)
         menu_button.clicked.connect(self.window().menu)
         clear_button = QPushButton("Очистить", self)
@@ -113,17 +119,59 @@ class GameWindow(QWidget):
 
         hbox = QHBoxLayout()
         hbox.setAlignment(Qt.AlignCenter)
-        hbox.addWidget(solve_button, 0, Qt.AlignCenter)
+        hbox.addWidget(self.solve_button, 0, Qt.AlignCenter)
         hbox.addWidget(clear_button, 0, Qt.AlignCenter)
         hbox.addWidget(menu_button, 0, Qt.AlignCenter)
 
+        progress_box = QHBoxLayout()
+        progress_box.setAlignment(Qt.AlignCenter)
+        progress_box.addWidget(self.progress, 0, Qt.AlignCenter)
+        progress_box.addWidget(self.cancel_button, 0, Qt.AlignCenter)
+        progress_box.addWidget(self.retry_button, 0, Qt.AlignCenter)
+
         vbox = QVBoxLayout(self)
         vbox.setAlignment(Qt.AlignCenter)
         vbox.addWidget(self.board, 0, Qt.AlignCenter)
         vbox.addLayout(hbox)
+        vbox.addWidget(self.status, 0, Qt.AlignCenter)
+        vbox.addLayout(progress_box)
 
         self.board.when_solved = self.show_finish_dialog
 
+    def start_solving(self):
+        """
+        Запускает поиск решений в фоне: пока он идет, в задачу можно
+        играть, а ход поиска отображается под полем.
+        """
+        self.status.setText("Поиск решений...")
+        self.progress.setValue(0)
+        self.progress.show()
+        self.cancel_button.show()
+        self.retry_button.hide()
+        worker = self.board.create_worker()
+        worker.level_reached.connect(self.show_level)
+        worker.solved.connect(self.finish_solving)
+        worker.cancelled.connect(self.show_cancelled)
+        # Поток запускается после подключения сигналов, иначе быстрый
+        # поиск может завершиться раньше
+        worker.start()
+
+    def show_level(self, level, total):
+        self.progress.setMaximum(total)
+        self.progress.setValue(level)
+        self.status.setText(f"Построение диаграммы: ребро {level} из {total}")
+
+    def finish_solving(self, diagrams, count):
+        self.progress.hide()
+        self.cancel_button.hide()
+        self.status.setText(f"Всего решений: {count}")
+
+    def show_cancelled(self):
+        self.progress.hide()
+        self.cancel_button.hide()
+        self.retry_button.show()
+        self.status.setText("Поиск решений отменен")
+
     def show_finish_dialog(self):
         msb = QDialog(self)
         msb.resize(100, 100)
@@ -149,11 +197,33 @@ class GameWindow(QWidget):
         vbox.addLayout(hbox)
 
     def solve(self):
-        if not self.board.solutions:
+        if self.board.diagrams is None:
+            self.show_first_solution()
+        else:
+            self.show_solution(self.board.sample_solutions(1))
+
+    def show_first_solution(self):
+        """
+        Пока диаграммы решений не построены, показывает решение, найденное
+        перебором с возвратом в отдельном потоке. Поиск запускается при
+        первом нажатии, а решение показывается, как только найдено.
+        """
+        if self.board.first_solutions is not None:
+            self.show_solution(self.board.first_solutions)
+        elif self.board.first_worker is None:
+            self.status.setText("Поиск решения...")
+            worker = self.board.create_first_worker()
+            worker.found.connect(
+                lambda _: self.show_solution(self.board.first_solutions))
+            worker.start()
+        else:
+            self.status.setText("Решение еще не найдено")
+
+    def show_solution(self, solutions):
+        if not solutions:
             self.show_no_solutions()
         else:
-            index = random.randint(0, len(self.board.solutions) - 1)
-            self.board.set_field(self.board.solutions[index].field)
+            self.board.set_field(solutions[0].field)
 
     def show_no_solutions(self):
         msg = QMessageBox()
@@ -202,16 +272,26 @@ class NumberlinkWindow(QMainWindow):
 
     def generate_level(self):
         self.history.clear()
+        self.stop_game()
         self.game = GameWindow(generate_field(FIELD_SIZE), self)
         self.centralWidget().addWidget(self.game)
         self.centralWidget().setCurrentWidget(self.game)
 
     def load_game(self, field):
         self.history.clear()
+        self.stop_game()
         self.game = GameWindow(field, self)
         self.centralWidget().addWidget(self.game)
         self.centralWidget().setCurrentWidget(self.game)
 
+    def stop_game(self):
+        if self.game is not None:
+            self.game.board.stop_solving()
+
+    def closeEvent(self, event):
+        self.stop_game()
+        super().closeEvent(event)
+
     def go_back(self):
         self.centralWidget().setCurrentWidget(self.history.pop())
 
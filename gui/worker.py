@@ -0,0 +1,74 @@
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from algorithms.solver import build_regions
+
+# Кэш решений общий для всех потоков поиска, поэтому обращения к нему идут
+# по одному
+cache_lock = threading.Lock()
+
+
+class SolvingCancelled(Exception):
+    pass
+
+
+class SolveWorker(QThread):
+    """
+    Поток, в котором строятся диаграммы решений задачи. Сообщает о
+    построенных уровнях диаграммы (level_reached), а по окончании передает
+    диаграммы областей задачи и количество решений, сохраненное в кэше
+    (solved). Сами решения не перечисляются: их можно выбирать из диаграмм
+    по мере надобности (см. solver.sample_combinations). Поиск можно
+    прервать методом cancel, тогда вместо solved отправляется cancelled.
+    """
+    level_reached = pyqtSignal(int, int)
+    # Количество решений может не поместиться в int C++
+    solved = pyqtSignal(object, object)
+    cancelled = pyqtSignal()
+
+    def __init__(self, game, cache, parent=None):
+        super().__init__(parent)
+        self.game = game
+        self.cache = cache
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def report_level(self, level, total):
+        self.check_cancelled()
+        self.level_reached.emit(level, total)
+
+    def check_cancelled(self):
+        if self.is_cancelled:
+            raise SolvingCancelled()
+
+    def run(self):
+        try:
+            diagrams = build_regions(self.game, progress=self.report_level)
+            self.check_cancelled()
+            with cache_lock:
+                count = self.cache.count_solutions(self.game,
+                                                   diagrams=diagrams)
+            self.solved.emit(diagrams, count)
+        except SolvingCancelled:
+            self.cancelled.emit()
+
+
+class FirstSolutionWorker(QThread):
+    """
+    Поток, в котором перебором с возвратом ищется одно решение задачи,
+    пока диаграммы решений еще строятся, или берется из кэша. По окончании
+    передает решение или None, если решений нет (found).
+    """
+    found = pyqtSignal(object)
+
+    def __init__(self, game, cache, parent=None):
+        super().__init__(parent)
+        self.game = game
+        self.cache = cache
+
+    def run(self):
+        with cache_lock:
+            solutions = list(self.cache.solve(self.game, 1,
+                                              engine="backtrack"))
+        self.found.emit(solutions[0] if solutions else None)
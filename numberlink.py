@@ -1,4 +1,5 @@
 import collections
+import functools
 import itertools
 import copy
 from graph_tools import Graph
@@ -93,6 +94,147 @@ class HexagonalField:
 
         return graph
 
+    def canonical_form(self):
+        """
+        Приводит поле к каноническому виду с точностью до 12 симметрий
+        шестиугольника и перенумерации непустых клеток: среди всех образов
+        поля выбирается лексикографически наименьший, числа в котором
+        перенумерованы в порядке появления.
+        Возвращает поле того же типа и преобразование, переводящее исходное
+        поле в каноническое.
+        """
+        cells = list(itertools.chain(*self.field))
+        best = None
+        for symmetry, sources in enumerate(get_symmetries(self.size)):
+            labels = {}
+            image = tuple(
+                labels.setdefault(cells[k], len(labels) + 1)
+                if cells[k] != CELL_EMPTY else CELL_EMPTY
+                for k in sources
+            )
+            if best is None or image < best[0]:
+                best = image, symmetry, labels
+        image, symmetry, labels = best
+        transform = Transform(self.size, symmetry, labels)
+        return type(self)(transform.split(image)), transform
+
+
+class Transform:
+    """
+    Преобразование поля: симметрия шестиугольника с номером symmetry (см.
+    get_symmetries) и перенумерация labels непустых клеток.
+    """
+    def __init__(self, size, symmetry, labels):
+        self.size = size
+        self.symmetry = symmetry
+        self.labels = labels
+        self.inverse = {label: number for number, label in labels.items()}
+
+    def apply(self, field):
+        """
+        Переводит исходное поле в каноническое.
+        """
+        cells = list(itertools.chain(*field))
+        sources = get_symmetries(self.size)[self.symmetry]
+        return self.split([self.labels.get(cells[k], cells[k])
+                           for k in sources])
+
+    def restore(self, field):
+        """
+        Переводит каноническое поле (например, решение канонической задачи)
+        обратно в исходное.
+        """
+        cells = list(itertools.chain(*field))
+        sources = get_symmetries(self.size)[self.symmetry]
+        restored = [CELL_EMPTY] * len(cells)
+        for k, source in enumerate(sources):
+            restored[source] = self.inverse.get(cells[k], cells[k])
+        return self.split(restored)
+
+    def restore_solution(self, solution):
+        """
+        Переводит решение канонической задачи в виде списка ребер в решение
+        исходной задачи.
+        """
+        positions = get_positions(self.size)
+        index = get_position_index(self.size)
+        sources = get_symmetries(self.size)[self.symmetry]
+        return [[positions[sources[index[v]]] for v in edge]
+                for edge in solution]
+
+    def split(self, cells):
+        """
+        Разбивает последовательность клеток поля на уровни.
+        """
+        cells = iter(cells)
+        return [list(itertools.islice(cells, length))
+                for length in get_level_lengths(self.size)]
+
+
+def get_level_lengths(size):
+    middle = size // 2
+    return [size - abs(middle - i) for i in range(size)]
+
+
+def generate_hexagonal_field(size):
+    distance = size - size // 2
+    sequence = itertools.chain(range(distance, size),
+                               range(size, distance - 1, -1))
+    return [[0] * i for i in sequence]
+
+
+@functools.lru_cache(maxsize=None)
+def get_positions(size):
+    """
+    Возвращает клетки поля размера size в построчном порядке.
+    """
+    return tuple((i, j) for i, length in enumerate(get_level_lengths(size))
+                 for j in range(length))
+
+
+@functools.lru_cache(maxsize=None)
+def get_position_index(size):
+    """
+    Возвращает словарь, сопоставляющий клетке ее номер в get_positions.
+    """
+    return {position: k for k, position in enumerate(get_positions(size))}
+
+
+@functools.lru_cache(maxsize=None)
+def get_symmetries(size):
+    """
+    Принимает на вход размер поля.
+    Возвращает 12 симметрий шестиугольника (6 поворотов, каждый с
+    отражением и без) в виде кортежей: k-я клетка образа поля (клетки
+    нумеруются построчно) берется из клетки с номером sources[k].
+    """
+    middle = size // 2
+    positions = get_positions(size)
+    index = get_position_index(size)
+
+    def to_cube(position):
+        level, column = position
+        x, z = column - min(level, middle), level - middle
+        return x, -x - z, z
+
+    def from_cube(x, y, z):
+        level = z + middle
+        return level, x + min(level, middle)
+
+    symmetries = []
+    for reflect in (False, True):
+        for rotation in range(6):
+            sources = [0] * len(positions)
+            for k, position in enumerate(positions):
+                x, y, z = to_cube(position)
+                if reflect:
+                    y, z = z, y
+                for _ in range(rotation):
+                    x, y, z = -z, -x, -y
+                sources[index[from_cube(x, y, z)]] = k
+            symmetries.append(tuple(sources))
+    return tuple(symmetries)
+
 
 class HexLink(HexagonalField):
 
@@ -128,6 +270,44 @@ class HexLink(HexagonalField):
 
         return targets
 
+    def verify(self, field):
+        """
+        Принимает на вход поле того же размера, заполненное игроком.
+        Проверяет, что поле является решением задачи: числа задачи остались
+        на своих местах, пустых клеток нет, а клетки каждого числа можно
+        обойти простым путем между его концами.
+        Покрытие, концы, степени и связность клеток проверяются за линейное
+        время; перебор нужен только для путей, касающихся себя (см.
+        has_simple_path).
+        """
+        levels = [list(level) for level in field]
+        if [len(level) for level in levels] != [len(level) for level in self]:
+            return False
+        ends = collections.defaultdict(list)
+        cells = collections.defaultdict(set)
+        for i, level in enumerate(self.field):
+            for j, cell in enumerate(level):
+                number = levels[i][j]
+                if number == CELL_EMPTY or cell not in (CELL_EMPTY, number):
+                    return False
+                if cell != CELL_EMPTY:
+                    ends[cell].append((i, j))
+                cells[number].add((i, j))
+        if set(cells) != set(ends):
+            return False
+
+        def same_neighbours(position):
+            number = levels[position[0]][position[1]]
+            return [neighbour for neighbour in self.get_neighbours(*position)
+                    if levels[neighbour[0]][neighbour[1]] == number]
+
+        adjacent = {position: same_neighbours(position)
+                    for number in cells for position in cells[number]}
+        for number, (start, end) in ends.items():
+            if not has_simple_path(adjacent, cells[number], start, end):
+                return False
+        return True
+
     @staticmethod
     def check_field(field):
         if field is None:
@@ -179,3 +359,297 @@ class HexLink(HexagonalField):
             for j, cell in enumerate(level):
                 if not str(cell).isnumeric():
                     raise ValueError(f"Некорректный символ на позиции {i, j}")
+
+
+class PathState:
+    """
+    Состояние поля, которое заполняет игрок, обновляемое при изменении
+    одной клетки (см. set_cell) за время, не зависящее от размера поля.
+    Считаются пустые клетки, клетки с числами не из задачи и измененные
+    концы путей. Для каждой клетки хранится количество соседей с тем же
+    числом, а для каждого числа - количество его клеток с недостающими
+    соседями (у конца пути должен быть один такой сосед, у остальных
+    клеток - два) и с лишними соседями, когда путь касается сам себя.
+    Число с недостающими соседями считается разорванным. Если счетчики
+    не исключают решение, путь числа, клетки которого изменились,
+    проверяется один раз: без касаний - проходом от конца, который
+    заодно исключает отдельные циклы, с касаниями - перебором (см.
+    has_simple_path).
+    """
+    def __init__(self, game: HexLink, field=None):
+        self.game = game
+        field = game.field if field is None else field
+        self.levels = [list(level) for level in field]
+        self.neighbours = {
+            (i, j): list(game.get_neighbours(i, j))
+            for i, level in enumerate(self.levels) for j in range(len(level))
+        }
+        ends = collections.defaultdict(list)
+        for i, level in enumerate(game.field):
+            for j, cell in enumerate(level):
+                if cell != CELL_EMPTY:
+                    ends[cell].append((i, j))
+        self.ends = dict(ends)
+        self.targets = {end for ends in self.ends.values() for end in ends}
+
+        self.cells = collections.defaultdict(set)
+        self.same = {}
+        self.defective = set()
+        self.defects = collections.Counter()
+        self.touching = set()
+        self.touches = collections.Counter()
+        self.checked = {}
+        self.empty = self.unknown = self.moved = 0
+        for position in self.neighbours:
+            self._add(position)
+        for position in self.neighbours:
+            self.same[position] = self._count_same(position)
+            self._update(position)
+
+    def __getitem__(self, position):
+        level, index = position
+        return self.levels[level][index]
+
+    def set_cell(self, position, number):
+        """
+        Записывает число в клетку, обновляя состояние ее и соседей.
+        """
+        old = self[position]
+        if old == number:
+            return
+        self._remove(position)
+        self.levels[position[0]][position[1]] = number
+        self._add(position)
+        for neighbour in self.neighbours[position]:
+            if self[neighbour] == old != CELL_EMPTY:
+                self.same[neighbour] -= 1
+                self._update(neighbour)
+            elif self[neighbour] == number != CELL_EMPTY:
+                self.same[neighbour] += 1
+                self._update(neighbour)
+        self.same[position] = self._count_same(position)
+        self._update(position)
+
+    def is_broken(self, number):
+        """
+        Проверяет, что путь числа прерывается: у одной из его клеток не
+        хватает соседей с тем же числом.
+        """
+        return self.defects[number] > 0
+
+    def is_solved(self):
+        if self.empty or self.unknown or self.moved or self.defective:
+            return False
+        return all(self._check_path(number) for number in self.ends)
+
+    def _check_path(self, number):
+        if number not in self.checked:
+            cells = self.cells[number]
+            start, end = self.ends[number]
+            if self.touches[number]:
+                adjacent = {cell: [neighbour
+                                   for neighbour in self.neighbours[cell]
+                                   if neighbour in cells]
+                            for cell in cells}
+                result = has_simple_path(adjacent, cells, start, end)
+            else:
+                result = self._walk(start, number) == len(cells)
+            self.checked[number] = result
+        return self.checked[number]
+
+    def _walk(self, start, number):
+        """
+        Проходит путь числа от конца start, когда у каждой клетки ровно
+        столько соседей с тем же числом, сколько нужно простому пути.
+        Возвращает количество пройденных клеток.
+        """
+        previous, current = None, start
+        count = 1
+        while True:
+            following = [neighbour for neighbour in self.neighbours[current]
+                         if self[neighbour] == number
+                         and neighbour != previous]
+            if not following:
+                return count
+            previous, current = current, following[0]
+            count += 1
+
+    def _count_same(self, position):
+        number = self[position]
+        return sum(self[neighbour] == number
+                   for neighbour in self.neighbours[position])
+
+    def _add(self, position):
+        number = self[position]
+        if position in self.targets and number != self.game[position]:
+            self.moved += 1
+        if number == CELL_EMPTY:
+            self.empty += 1
+        elif number not in self.ends:
+            self.unknown += 1
+        else:
+            self.cells[number].add(position)
+            self.checked.pop(number, None)
+
+    def _remove(self, position):
+        number = self[position]
+        if position in self.defective:
+            self.defective.remove(position)
+            self.defects[number] -= 1
+        if position in self.touching:
+            self.touching.remove(position)
+            self.touches[number] -= 1
+        if position in self.targets and number != self.game[position]:
+            self.moved -= 1
+        if number == CELL_EMPTY:
+            self.empty -= 1
+        elif number not in self.ends:
+            self.unknown -= 1
+        else:
+            self.cells[number].discard(position)
+            self.checked.pop(number, None)
+
+    def _update(self, position):
+        number = self[position]
+        required = 1 if position in self.targets else 2
+        is_defect = number in self.ends and self.same[position] < required
+        if is_defect and position not in self.defective:
+            self.defective.add(position)
+            self.defects[number] += 1
+        elif not is_defect and position in self.defective:
+            self.defective.remove(position)
+            self.defects[number] -= 1
+        is_touching = number in self.ends and self.same[position] > required
+        if is_touching and position not in self.touching:
+            self.touching.add(position)
+            self.touches[number] += 1
+        elif not is_touching and position in self.touching:
+            self.touching.remove(position)
+            self.touches[number] -= 1
+
+
+def has_simple_path(adjacent, cells, start, end):
+    """
+    Принимает на вход список смежности клеток одного числа, множество этих
+    клеток и концы пути.
+    Проверяет, что клетки можно обойти простым путем из start в end.
+    Если у концов по одному соседу, а у остальных клеток по два, связные
+    клетки образуют путь, и проверка занимает линейное время. На
+    шестиугольном поле путь с поворотом на 60 градусов касается сам себя,
+    и у клеток становится больше соседей; тогда путь ищется перебором
+    (см. search_path).
+    """
+    if start not in cells or end not in cells:
+        return False
+    # На сколько соседей у клетки больше, чем у клетки простого пути
+    excess = [len(adjacent[cell]) - (1 if cell in (start, end) else 2)
+              for cell in cells]
+    if min(excess) < 0:
+        return False
+    reached = {start}
+    queue = [start]
+    for cell in queue:
+        for neighbour in adjacent[cell]:
+            if neighbour not in reached:
+                reached.add(neighbour)
+                queue.append(neighbour)
+    if len(reached) != len(cells):
+        return False
+    if not any(excess):
+        return True
+    return search_path(adjacent, cells, start, end)
+
+
+def search_path(adjacent, cells, start, end):
+    """
+    Принимает на вход то же, что has_simple_path.
+    Ищет перебором с возвратом простой путь из start в end через все
+    клетки. Ход отбрасывается, если после него непосещенные клетки
+    нельзя обойти: у клетки не хватает свободных соседей или оставшиеся
+    клетки несвязны. Если у соседа текущей клетки свободных соседей ровно
+    два, ход в него обязателен.
+    """
+    visited = {start}
+    # Расстояния до end: при равенстве свободных соседей путь сначала
+    # уходит дальше от end, чтобы не отрезать его раньше времени
+    distance = {end: 0}
+    queue = [end]
+    for cell in queue:
+        for neighbour in adjacent[cell]:
+            if neighbour not in distance:
+                distance[neighbour] = distance[cell] + 1
+                queue.append(neighbour)
+
+    def count_free(cell, head):
+        return sum(1 for neighbour in adjacent[cell]
+                   if neighbour not in visited or neighbour == head)
+
+    def get_moves(head, previous):
+        remaining = len(cells) - len(visited)
+        if remaining == 1:
+            return [end] if end in adjacent[head] else []
+        # Свободных соседей стало меньше только у соседей previous
+        changed = adjacent[head] if previous is None else adjacent[previous]
+        for cell in itertools.chain(changed, [end]):
+            if cell in visited:
+                continue
+            required = 2 if cell != end else 1
+            if count_free(cell, None if cell == end else head) < required:
+                return []
+        reached = {head}
+        queue = [head]
+        for cell in queue:
+            for neighbour in adjacent[cell]:
+                if neighbour not in visited and neighbour not in reached:
+                    reached.add(neighbour)
+                    queue.append(neighbour)
+        if len(reached) != remaining + 1:
+            return []
+        moves = [cell for cell in adjacent[head]
+                 if cell not in visited and cell != end]
+        forced = [cell for cell in moves if count_free(cell, head) == 2]
+        if forced:
+            return forced if len(forced) == 1 else []
+        return sorted(moves, key=lambda cell: (count_free(cell, head),
+                                               -distance[cell]))
+
+    stack = [(start, iter(get_moves(start, None)))]
+    while stack:
+        cell, moves = stack[-1]
+        if cell == end:
+            return True
+        following = next(moves, None)
+        if following is None:
+            stack.pop()
+            visited.discard(cell)
+        else:
+            visited.add(following)
+            stack.append((following, iter(get_moves(following, cell))))
+    return False
+
+
+def format_field(field):
+    """
+    Принимает на вход поле.
+    Возвращает его запись в формате ввода cnumberlink.py: уровни поля
+    построчно, числа уровня через пробел.
+    """
+    return "\n".join(" ".join(map(str, level)) for level in field)
+
+
+def parse_fields(lines):
+    """
+    Принимает на вход итерируемый объект строк в формате ввода
+    cnumberlink.py, где поля разделены пустыми строками.
+    Генерирует поля в виде списков уровней, не проверяя их.
+    """
+    field = []
+    for line in lines:
+        level = line.split()
+        if level:
+            field.append(level)
+        elif field:
+            yield field
+            field = []
+    if field:
+        yield field
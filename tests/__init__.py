@@ -1,3 +1,12 @@
 import tests.test_numberlink
 import tests.test_generator
 import tests.test_solver
+import tests.test_ordering
+import tests.test_frontier
+import tests.test_corpus
+import tests.test_cache
+import tests.test_serialization
+import tests.test_presolve
+import tests.test_backtrack
+import tests.test_sat
+import tests.test_regions
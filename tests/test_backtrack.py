@@ -0,0 +1,92 @@
+import sys
+import unittest
+from algorithms.backtrack import solve_backtracking, Search
+from algorithms.solver import solve, choose_engine
+from numberlink import HexLink, get_level_lengths
+
+
+def as_set(solutions):
+    return {frozenset(frozenset(edge) for edge in solution)
+            for solution in solutions}
+
+
+class BacktrackTest(unittest.TestCase):
+    def setUp(self):
+        self.instance_one_solution = HexLink([
+            [1, 0],      # 1 0
+            [0, 2, 1],  # 0 2 1
+            [0, 2]       # 0 2
+        ])
+        self.instance_many_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [1, 2],      # 1 2
+        ])
+        self.instance_no_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [2, 1]       # 2 1
+        ])
+        self.instance = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 2],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [1, 0, 2]
+        ])
+
+    def test_same_solutions_as_diagram(self):
+        for instance in (self.instance_one_solution,
+                         self.instance_many_solutions,
+                         self.instance_no_solutions,
+                         self.instance):
+            actual = list(solve_backtracking(instance))
+            self.assertEqual(len(actual), len(as_set(actual)))
+            self.assertSetEqual(as_set(solve(instance, engine="zdd")),
+                                as_set(actual))
+
+    def test_long_corridor(self):
+        # Путь проходит через все 331 клетку поля, а глубина рекурсии
+        # ограничена меньшим числом
+        lengths = get_level_lengths(21)
+        field = [[0] * length for length in lengths]
+        field[0][0] = field[-1][-1] = 1
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        try:
+            solution = next(solve_backtracking(HexLink(field), 1))
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(330, len(solution))
+
+    def test_limit(self):
+        self.assertEqual(1, len(list(solve_backtracking(self.instance, 1))))
+        self.assertEqual(0, len(list(solve_backtracking(self.instance, 0))))
+
+    def test_dead_cell(self):
+        search = Search(self.instance_one_solution)
+        self.assertTrue(search.is_consistent())
+        # Двойка соединяется напрямую, единица - через (0, 1): клетки (1, 0)
+        # и (2, 0) остаются пустыми, и пройти через них некому
+        search.move(2, 6)
+        search.move(1, 1)
+        search.move(1, 4)
+        self.assertFalse(search.is_consistent())
+        self.assertListEqual([], list(search.solve()))
+
+    def test_choose_engine(self):
+        self.assertEqual("backtrack", choose_engine("auto", 1))
+        self.assertEqual("zdd", choose_engine("auto", None))
+        self.assertEqual("zdd", choose_engine("auto", 100))
+        self.assertEqual("zdd", choose_engine("zdd", 1))
+        with self.assertRaises(ValueError):
+            choose_engine("unknown", 1)
+
+    def test_solve_with_engine(self):
+        solutions = list(solve(self.instance, 1, engine="backtrack"))
+        self.assertEqual(1, len(solutions))
+        self.assertTrue(as_set(solutions) <= as_set(solve(self.instance)))
+
+
+if __name__ == '__main__':
+    unittest.main()
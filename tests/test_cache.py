@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+from algorithms import solver
+from algorithms.cache import SolutionCache
+from numberlink import HexLink
+
+
+def as_set(solutions):
+    return {frozenset(frozenset(edge) for edge in solution)
+            for solution in solutions}
+
+
+class SolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.game = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [1, 2],      # 1 2
+        ])
+        # Отражение задачи с перенумерованными парами
+        self.image = HexLink([
+            [2, 1],      # 2 1
+            [0, 0, 0],  # 0 0 0
+            [2, 1],      # 2 1
+        ])
+        self.unique = HexLink([
+            [1, 0],      # 1 0
+            [0, 2, 1],  # 0 2 1
+            [0, 2]       # 0 2
+        ])
+        self.cache = SolutionCache()
+
+    def test_solve(self):
+        expected = as_set(solver.solve(self.game))
+        self.assertSetEqual(expected, as_set(self.cache.solve(self.game)))
+        self.assertSetEqual(expected, as_set(self.cache.solve(self.game)))
+        self.assertEqual(1, len(self.cache))
+
+    def test_solve_symmetric_instance(self):
+        list(self.cache.solve(self.game))
+        self.assertIn(self.image, self.cache)
+        self.assertSetEqual(as_set(solver.solve(self.image)),
+                            as_set(self.cache.solve(self.image)))
+        self.assertEqual(1, len(self.cache))
+
+    def test_solve_beyond_stored(self):
+        cache = SolutionCache(solutions=1)
+        expected = list(solver.solve(self.game))
+        self.assertEqual(len(expected), len(list(cache.solve(self.game))))
+        self.assertSetEqual(as_set(expected), as_set(cache.solve(self.game)))
+        self.assertEqual(1, len(list(cache.solve(self.game, limit=1))))
+
+    def test_solve_backtracking_not_stored(self):
+        solutions = list(self.cache.solve(self.game, 1, engine="backtrack"))
+        self.assertEqual(1, len(solutions))
+        self.assertTrue(as_set(solutions) <= as_set(solver.solve(self.game)))
+        self.assertEqual(0, len(self.cache))
+        list(self.cache.solve(self.game))
+        self.assertListEqual(list(self.cache.solve(self.game))[:1],
+                             list(self.cache.solve(self.game, 1)))
+
+    def test_count_solutions(self):
+        self.assertEqual(solver.count_solutions(self.game),
+                         self.cache.count_solutions(self.game))
+        self.assertEqual(2, self.cache.count_solutions(self.image, limit=2))
+        self.assertTrue(self.cache.has_unique_solution(self.unique))
+        self.assertFalse(self.cache.has_unique_solution(self.image))
+
+    def test_count_solutions_from_diagrams(self):
+        diagrams = solver.build_regions(self.image)
+        self.assertEqual(solver.count_solutions(self.image),
+                         self.cache.count_solutions(self.image,
+                                                    diagrams=diagrams))
+        self.assertIn(self.game, self.cache)
+        self.assertEqual(solver.count_solutions(self.game),
+                         self.cache.count_solutions(self.game, diagrams=[]))
+
+    def test_solutions_range(self):
+        expected = list(self.cache.solve(self.game))
+        self.assertListEqual(expected[1:3],
+                             list(self.cache.solutions_range(self.game, 1, 3)))
+        cache = SolutionCache(solutions=1)
+        self.assertListEqual(expected[1:],
+                             list(cache.solutions_range(self.game, 1)))
+
+    def test_sample_solutions(self):
+        expected = as_set(solver.solve(self.game))
+        list(self.cache.solve(self.game))
+        samples = self.cache.sample_solutions(self.game, 10, seed=1)
+        self.assertEqual(10, len(samples))
+        self.assertTrue(as_set(samples) <= expected)
+
+    def test_describe_engine(self):
+        self.assertEqual("zdd", self.cache.describe_engine(self.game))
+        self.assertEqual("backtrack",
+                         self.cache.describe_engine(self.game, 1))
+        self.assertEqual("zdd", self.cache.describe_engine(self.game, 1,
+                                                           offset=1))
+        list(self.cache.solve(self.game))
+        self.assertEqual("cache (zdd)",
+                         self.cache.describe_engine(self.image))
+        self.assertEqual("cache (zdd)",
+                         self.cache.describe_engine(self.image, 1,
+                                                    "backtrack"))
+        self.assertEqual("cache (zdd)",
+                         self.cache.describe_engine(self.image, 1, offset=1))
+
+    def test_eviction(self):
+        cache = SolutionCache(memory=1)
+        list(cache.solve(self.game))
+        self.assertEqual(0, len(cache))
+        cache = SolutionCache()
+        list(cache.solve(self.game))
+        cache.memory = cache.used
+        list(cache.solve(self.unique))
+        self.assertNotIn(self.game, cache)
+        self.assertIn(self.unique, cache)
+
+    def test_persistence(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with SolutionCache(path=path) as cache:
+                expected = list(cache.solve(self.game))
+            with SolutionCache(path=path) as cache:
+                self.assertEqual(0, len(cache))
+                self.assertEqual(len(expected),
+                                 cache.count_solutions(self.image))
+                _, (entry, _) = cache.entries.popitem()
+                self.assertEqual(len(expected), len(entry["solutions"]))
+                self.assertListEqual(expected, list(cache.solve(self.game)))
+        finally:
+            os.remove(path)
+
+    def test_persistence_ignores_foreign_data(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with SolutionCache(path=path) as cache:
+                expected = list(cache.solve(self.game))
+                with cache.database:
+                    cache.database.execute("UPDATE entries SET data = ?",
+                                           (b"\x80\x04not json",))
+            with SolutionCache(path=path) as cache:
+                self.assertNotIn(self.game, cache)
+                self.assertListEqual(expected, list(cache.solve(self.game)))
+                self.assertIn(self.game, cache)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import io
+import os
+import tempfile
+import unittest
+from corpus import (CorpusWriter, CorpusReader, is_corpus, text_to_corpus,
+                    corpus_to_text, HEADER)
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.fields = [
+            [[1, 2], [0, 0, 0], [1, 2]],
+            [[1, 0], [2, 0, 2], [0, 1]],
+            [[0, 0], [0, 0, 0], [0, 0]]
+        ]
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write_fields(self):
+        with CorpusWriter(self.path, 3) as writer:
+            for field in self.fields:
+                writer.write(field)
+
+    def test_write_and_read(self):
+        self.write_fields()
+        with CorpusReader(self.path) as reader:
+            self.assertEqual(3, reader.size)
+            self.assertEqual(len(self.fields), len(reader))
+            self.assertListEqual(self.fields, list(reader))
+
+    def test_fixed_width_records(self):
+        self.write_fields()
+        self.assertEqual(HEADER.size + 7 * len(self.fields),
+                         os.path.getsize(self.path))
+
+    def test_random_access(self):
+        self.write_fields()
+        with CorpusReader(self.path) as reader:
+            self.assertListEqual(self.fields[1], reader[1])
+            self.assertListEqual(self.fields[2], reader[-1])
+            with self.assertRaises(IndexError):
+                _ = reader[len(self.fields)]
+
+    def test_write_wrong_size(self):
+        with CorpusWriter(self.path, 5) as writer:
+            with self.assertRaises(ValueError):
+                writer.write(self.fields[0])
+            self.assertEqual(0, writer.count)
+
+    def test_read_not_corpus(self):
+        with open(self.path, "w") as file:
+            file.write("1 2\n0 0 0\n1 2\n")
+        self.assertFalse(is_corpus(self.path))
+        with self.assertRaises(ValueError):
+            CorpusReader(self.path)
+
+    def test_read_empty_file(self):
+        with self.assertRaisesRegex(ValueError, "не является корпусом"):
+            CorpusReader(self.path)
+
+    def test_read_truncated(self):
+        self.write_fields()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        for length in (HEADER.size - 1, HEADER.size, len(data) - 1):
+            with open(self.path, "wb") as file:
+                file.write(data[:length])
+            with self.assertRaises(ValueError):
+                CorpusReader(self.path)
+        with open(self.path, "ab") as file:
+            file.write(b"\0\0")
+        with self.assertRaisesRegex(ValueError, "поврежден"):
+            CorpusReader(self.path)
+
+    def test_read_wrong_header(self):
+        self.write_fields()
+        with open(self.path, "r+b") as file:
+            file.write(HEADER.pack(b"HEXL", 2, 3, 0, len(self.fields)))
+        with self.assertRaisesRegex(ValueError, "Версия"):
+            CorpusReader(self.path)
+        with open(self.path, "r+b") as file:
+            file.write(HEADER.pack(b"HEXL", 1, 4, 0, len(self.fields)))
+        with self.assertRaisesRegex(ValueError, "нечетным"):
+            CorpusReader(self.path)
+
+    def test_text_round_trip(self):
+        text = "1 2\n0 0 0\n1 2\n\n1 0\n2 0 2\n0 1\n\n0 0\n0 0 0\n0 0\n\n"
+        count = text_to_corpus(io.StringIO(text), self.path)
+        self.assertEqual(3, count)
+        self.assertTrue(is_corpus(self.path))
+        stream = io.StringIO()
+        self.assertEqual(3, corpus_to_text(self.path, stream))
+        self.assertEqual(text, stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from algorithms.frontier import *
+
+
+class FrontierTest(unittest.TestCase):
+    def setUp(self):
+        edges = [["p", "q"], ["p", "r"], ["q", "r"], ["q", "s"]]
+        targets = {"vertices": {"p", "s"}, "pairs": {frozenset("ps")}}
+        self.frontier = compile_frontier(edges, targets)
+        self.ids = {v: i for i, v in enumerate(self.frontier.vertices)}
+
+    def get_names(self, vertices):
+        return [self.frontier.vertices[v] for v in vertices]
+
+    def test_vertices_numbered_from_one(self):
+        self.assertListEqual([None, "p", "q", "r", "s"],
+                             self.frontier.vertices)
+
+    def test_entering(self):
+        expected = [["p", "q"], ["r"], [], ["s"]]
+        actual = [self.get_names(level.entering)
+                  for level in self.frontier.levels]
+        self.assertListEqual(expected, actual)
+
+    def test_leaving(self):
+        expected = [[], ["p"], ["r"], ["q", "s"]]
+        actual = [self.get_names(v for _, v, _ in level.leaving)
+                  for level in self.frontier.levels]
+        self.assertListEqual(expected, actual)
+
+    def test_keep(self):
+        expected = [["p", "q"], ["q", "r"], ["q"], []]
+        actual = []
+        for level in self.frontier.levels:
+            domain = sorted(level.positions, key=level.positions.get)
+            actual.append(self.get_names(domain[i] for i in level.keep))
+        self.assertListEqual(expected, actual)
+
+    def test_partner(self):
+        p, s = self.ids["p"], self.ids["s"]
+        self.assertEqual(s, self.frontier.partner[p])
+        self.assertEqual(0, self.frontier.partner[self.ids["q"]])
+
+    def test_is_closed(self):
+        r = self.ids["r"]
+        self.assertTrue(self.frontier.is_closed(self.ids["p"], 0))
+        self.assertFalse(self.frontier.is_closed(r, 1))
+        self.assertTrue(self.frontier.is_closed(r, 2))
+        self.assertFalse(self.frontier.is_closed(0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
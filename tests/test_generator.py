@@ -1,5 +1,6 @@
 import unittest
 from algorithms.generator import *
+from algorithms.solver import has_unique_solution
 
 
 class PathConstructorTest(unittest.TestCase):
@@ -98,6 +99,31 @@ class PathConstructorTest(unittest.TestCase):
             PathConstructor(self.field).can_add_cell((0, 1), 1)
         )
 
+    def test_construct_records_path_cells(self):
+        random.seed(3)
+        self.constructor.construct()
+        cells = [cell for path in self.constructor.paths
+                 for cell in path.cells]
+        self.assertEqual(self.constructor.cells_amount, len(set(cells)))
+        self.assertEqual(len(cells), len(set(cells)))
+        for path in self.constructor.paths:
+            self.assertEqual(path.start, path.cells[0])
+            self.assertEqual(path.end, path.cells[-1])
+
+    def test_repairs_cover_all_cells(self):
+        random.seed(5)
+        self.constructor.construct()
+        paths = [path.cells for path in self.constructor.paths]
+        expected = sorted(cell for path in paths for cell in path)
+        for repaired in self.constructor.get_repairs(paths):
+            actual = sorted(cell for path in repaired for cell in path)
+            self.assertListEqual(expected, actual)
+            for path in repaired:
+                self.assertGreaterEqual(len(path), 2)
+                for first, second in zip(path, path[1:]):
+                    self.assertIn(second,
+                                  list(self.field.get_neighbours(*first)))
+
 
 class GeneratorTest(unittest.TestCase):
     def test_count(self):
@@ -129,6 +155,54 @@ class GeneratorTest(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_get_field_with_ends(self):
+        expected = [
+            [1, 0],
+            [2, 0, 1],
+            [2, 0]
+        ]
+        paths = [[(0, 0), (0, 1), (1, 2)], [(1, 0), (1, 1), (2, 1), (2, 0)]]
+        actual = get_field_with_ends(3, paths)
+        self.assertListEqual(expected, actual)
+
+    def test_generate_unique_field(self):
+        random.seed(1)
+        for size in (3, 5):
+            field = generate_field(size, unique=True)
+            self.assertTrue(has_unique_solution(HexLink(field)))
+
+    def test_repair_reduces_solutions(self):
+        rng = random.Random(2)
+        for _ in range(5):
+            constructor = PathConstructor(
+                HexagonalField(generate_hexagonal_field(5)), rng
+            )
+            constructor.construct()
+            paths = [path.cells for path in constructor.paths]
+            field = get_field_with_ends(5, paths)
+            amount = count_first_solutions(field, MAX_COUNTED_SOLUTIONS)
+            repaired = constructor.repair(paths, field)
+            if amount == 1 or repaired is None:
+                continue
+            field = get_field_with_ends(5, repaired)
+            self.assertLess(count_first_solutions(field, amount), amount)
+
+    def test_generate_fields_reproducible(self):
+        expected = list(generate_fields(3, 4, seed=10))
+        self.assertListEqual([0, 1, 2, 3], [index for index, _ in expected])
+        self.assertListEqual(expected, list(generate_fields(3, 4, seed=10)))
+        self.assertListEqual(expected,
+                             list(generate_fields(3, 4, seed=10, jobs=2)))
+        actual = generate_fields(3, 4, seed=10, jobs=2, ordered=False)
+        self.assertListEqual(expected, sorted(actual))
+
+    def test_generate_fields_keeps_global_state(self):
+        random.seed(7)
+        expected = random.random()
+        random.seed(7)
+        list(generate_fields(3, 2, seed=10))
+        self.assertEqual(expected, random.random())
+
     def test_empty_cells(self):
         field = HexagonalField([
             [0, 1, 1],
@@ -1,5 +1,7 @@
 import unittest
-from numberlink import HexLink, HexagonalField
+from numberlink import (HexLink, HexagonalField, format_field, parse_fields,
+                        Transform, PathState, get_symmetries,
+                        has_simple_path, generate_hexagonal_field)
 from graph_tools import Graph
 
 
@@ -195,6 +197,208 @@ class HexLinkTest(unittest.TestCase):
 
         self.assertDictEqual(expected, actual)
 
+    def test_verify_solutions(self):
+        self.assertTrue(self.simple_game.verify([[1, 2], [1, 1, 2], [1, 2]]))
+        self.assertTrue(self.simple_game.verify([[1, 2], [1, 2, 2], [1, 2]]))
+        self.assertTrue(self.simple_game.verify(
+            HexagonalField([[1, 2], [1, 2, 2], [1, 2]])
+        ))
+
+    def test_verify_not_solutions(self):
+        fields = [
+            [[1, 2], [1, 0, 2], [1, 2]],   # пустая клетка
+            [[1, 2], [1, 2, 1], [1, 2]],   # клетка вне пути
+            [[1, 2], [1, 3, 2], [1, 2]],   # число не из задачи
+            [[2, 2], [1, 1, 2], [1, 2]],   # изменен конец пути
+            [[1, 2], [2, 2, 2], [1, 2]],   # путь разорван
+            [[1, 2], [1, 1, 2]]            # другой размер
+        ]
+        for field in fields:
+            self.assertFalse(self.simple_game.verify(field))
+
+    def test_verify_path_touching_itself(self):
+        game = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 1]
+        ])
+        self.assertTrue(game.verify([
+            [1, 1, 1],
+            [1, 1, 1, 1],
+            [1, 1, 1, 1, 1],
+            [1, 1, 1, 1],
+            [1, 1, 1]
+        ]))
+
+    def test_verify_large_path_touching_itself(self):
+        # Путь змейкой по строкам касается себя на каждом повороте
+        size = 21
+        field = generate_hexagonal_field(size)
+        path = []
+        for i, level in enumerate(field):
+            row = [(i, j) for j in range(len(level))]
+            path.extend(row if i % 2 == 0 else row[::-1])
+        for (i, j) in (path[0], path[-1]):
+            field[i][j] = 1
+        game = HexLink(field)
+        filled = [[1] * len(level) for level in field]
+        self.assertTrue(game.verify(filled))
+        self.assertTrue(PathState(game, filled).is_solved())
+
+    def test_has_simple_path(self):
+        line = [(0, 0), (0, 1), (0, 2)]
+        adjacent = {(0, 0): [(0, 1)], (0, 1): [(0, 0), (0, 2)],
+                    (0, 2): [(0, 1)]}
+        self.assertTrue(has_simple_path(adjacent, set(line), *line[::2]))
+        self.assertFalse(has_simple_path(adjacent, set(line), *line[:2]))
+
+    def test_format_field(self):
+        expected = "1 2\n0 0 0\n1 2"
+        self.assertEqual(expected, format_field([[1, 2], [0, 0, 0], [1, 2]]))
+
+    def test_parse_fields(self):
+        lines = ["1 2", "0 0 0", "1 2", "", "", "1  2", "0 0 0", "2 1"]
+        expected = [
+            [["1", "2"], ["0", "0", "0"], ["1", "2"]],
+            [["1", "2"], ["0", "0", "0"], ["2", "1"]]
+        ]
+        self.assertListEqual(expected, list(parse_fields(lines)))
+
+
+class PathStateTest(unittest.TestCase):
+    def setUp(self):
+        self.game = HexLink([
+            [1, 2],
+            [0, 0, 0],
+            [1, 2]
+        ])
+        self.state = PathState(self.game)
+
+    def fill(self, numbers):
+        for position, number in zip([(1, 0), (1, 1), (1, 2)], numbers):
+            self.state.set_cell(position, number)
+
+    def test_initial_state(self):
+        self.assertEqual(3, self.state.empty)
+        self.assertTrue(self.state.is_broken(1))
+        self.assertTrue(self.state.is_broken(2))
+        self.assertFalse(self.state.is_solved())
+
+    def test_solved(self):
+        self.fill([1, 1, 2])
+        self.assertFalse(self.state.is_broken(1))
+        self.assertFalse(self.state.is_broken(2))
+        self.assertTrue(self.state.is_solved())
+
+    def test_solved_after_changes(self):
+        self.fill([1, 2, 2])
+        self.fill([2, 1, 1])
+        self.assertFalse(self.state.is_solved())
+        self.fill([1, 1, 2])
+        self.assertTrue(self.state.is_solved())
+        self.state.set_cell((1, 1), 0)
+        self.assertFalse(self.state.is_solved())
+
+    def test_broken_path(self):
+        self.fill([1, 2, 1])
+        self.assertTrue(self.state.is_broken(1))
+        self.assertFalse(self.state.is_broken(2))
+        self.assertFalse(self.state.is_solved())
+
+    def test_unknown_number(self):
+        self.fill([1, 3, 2])
+        self.assertFalse(self.state.is_solved())
+
+    def test_moved_end(self):
+        self.fill([1, 1, 2])
+        self.state.set_cell((0, 0), 2)
+        self.assertFalse(self.state.is_solved())
+        self.state.set_cell((0, 0), 1)
+        self.assertTrue(self.state.is_solved())
+
+    def test_detached_cycle(self):
+        # У клеток числа 1 нужное количество соседей, но три из них
+        # образуют отдельный цикл
+        game = HexLink([
+            [0, 2, 2],
+            [0, 0, 0, 0],
+            [1, 0, 0, 0, 1],
+            [0, 0, 0, 0],
+            [0, 0, 0]
+        ])
+        state = PathState(game, [
+            [2, 2, 2],
+            [2, 1, 1, 2],
+            [1, 2, 1, 2, 1],
+            [1, 2, 2, 1],
+            [1, 1, 1]
+        ])
+        self.assertFalse(state.defective)
+        self.assertEqual(0, state.touches[1])
+        self.assertFalse(state.is_solved())
+
+    def test_matches_fresh_state(self):
+        self.fill([1, 2, 2])
+        self.fill([2, 1, 0])
+        fresh = PathState(self.game, self.state.levels)
+        self.assertDictEqual(fresh.same, self.state.same)
+        self.assertSetEqual(fresh.defective, self.state.defective)
+
+
+class CanonicalFormTest(unittest.TestCase):
+    def setUp(self):
+        self.game = HexLink([
+            [3, 0, 0],
+            [4, 1, 0, 0],
+            [0, 0, 2, 2, 3],
+            [0, 0, 1, 4],
+            [0, 0, 0]
+        ])
+
+    def test_symmetries_preserve_neighbours(self):
+        field = HexagonalField(self.game.field)
+        positions = [(i, j) for i, level in enumerate(field)
+                     for j in range(len(level))]
+        index = {position: k for k, position in enumerate(positions)}
+        edges = {frozenset((index[u], index[v]))
+                 for u, v in field.make_graph().edges()}
+        symmetries = get_symmetries(field.size)
+        self.assertEqual(12, len(set(symmetries)))
+        for sources in symmetries:
+            image = {k: source for source, k in enumerate(sources)}
+            self.assertSetEqual(
+                edges, {frozenset(image[k] for k in edge) for edge in edges}
+            )
+
+    def test_canonical_form_is_invariant(self):
+        canonical, _ = self.game.canonical_form()
+        relabeled = HexLink([
+            [1, 0, 0],
+            [2, 4, 0, 0],
+            [0, 0, 3, 3, 1],
+            [0, 0, 4, 2],
+            [0, 0, 0]
+        ])
+        self.assertListEqual(canonical.field,
+                             relabeled.canonical_form()[0].field)
+        for symmetry in range(12):
+            image = HexLink(Transform(5, symmetry, {}).apply(self.game))
+            self.assertListEqual(canonical.field,
+                                 image.canonical_form()[0].field)
+
+    def test_canonical_form_type(self):
+        canonical, _ = self.game.canonical_form()
+        self.assertIsInstance(canonical, HexLink)
+
+    def test_transform_round_trip(self):
+        canonical, transform = self.game.canonical_form()
+        self.assertListEqual(canonical.field,
+                             transform.apply(self.game.field))
+        self.assertListEqual(self.game.field,
+                             transform.restore(canonical.field))
+
 
 if __name__ == '__main__':
     unittest.main()
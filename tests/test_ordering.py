@@ -0,0 +1,46 @@
+import unittest
+from algorithms.ordering import *
+from algorithms.generator import generate_hexagonal_field
+
+
+class OrderingTest(unittest.TestCase):
+    def setUp(self):
+        self.field = HexagonalField(generate_hexagonal_field(5))
+        self.edges = get_edges(self.field)
+
+    def test_frontier_width_path(self):
+        self.assertEqual(1, frontier_width([["a", "b"], ["b", "c"]]))
+
+    def test_frontier_width_star(self):
+        edges = [["a", "b"], ["c", "d"], ["b", "c"]]
+        self.assertEqual(2, frontier_width(edges))
+
+    def test_frontier_width_empty(self):
+        self.assertEqual(0, frontier_width([]))
+
+    def test_strategies_keep_edges(self):
+        expected = sorted(self.edges)
+        for strategy in STRATEGIES:
+            ordering = make_ordering(self.field, strategy)
+            self.assertListEqual(expected, sorted(ordering.edges))
+            self.assertEqual(strategy, ordering.name)
+
+    def test_row_major_width(self):
+        self.assertEqual(5, make_ordering(self.field, "row").width)
+
+    def test_order_edges_picks_smallest_width(self):
+        expected = min(o.width for o in get_orderings(self.field))
+        self.assertEqual(expected, order_edges(self.field).width)
+
+    def test_order_edges_subset(self):
+        edges = self.edges[:5]
+        ordering = order_edges(self.field, edges=edges)
+        self.assertListEqual(sorted(edges), sorted(ordering.edges))
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            order_edges(self.field, "spiral")
+
+
+if __name__ == "__main__":
+    unittest.main()
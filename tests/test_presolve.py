@@ -0,0 +1,71 @@
+import unittest
+from algorithms.presolve import presolve
+from algorithms.solver import solve, build_diagram
+from algorithms.structures import Node
+from numberlink import HexLink
+
+
+class PresolveTest(unittest.TestCase):
+    def setUp(self):
+        self.instance_one_solution = HexLink([
+            [1, 0],      # 1 0
+            [0, 2, 1],  # 0 2 1
+            [0, 2]       # 0 2
+        ])
+        self.instance_many_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [1, 2],      # 1 2
+        ])
+        self.instance_dead_end = HexLink([
+            [1, 2],      # 1 2
+            [2, 0, 1],  # 2 0 1
+            [0, 0]       # 0 0
+        ])
+        self.instance = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 2],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [1, 0, 2]
+        ])
+
+    def test_forced_edges(self):
+        reduction = presolve(self.instance_one_solution)
+        solution = next(solve(self.instance_one_solution))
+        self.assertTrue(reduction.feasible)
+        self.assertSetEqual({tuple(edge) for edge in solution},
+                            reduction.fixed)
+        self.assertEqual(12, reduction.total)
+        self.assertEqual(7, len(reduction.removed))
+
+    def test_edges_between_different_numbers(self):
+        reduction = presolve(self.instance_many_solutions)
+        self.assertSetEqual({((0, 0), (0, 1)), ((2, 0), (2, 1))},
+                            reduction.removed)
+        self.assertSetEqual(set(), reduction.fixed)
+
+    def test_dead_end(self):
+        reduction = presolve(self.instance_dead_end)
+        self.assertFalse(reduction.feasible)
+        diagram = build_diagram(self.instance_dead_end)
+        self.assertIs(Node.TERMINAL_ZERO, diagram.root)
+        self.assertListEqual([], diagram.nodes)
+
+    def test_reduction_keeps_solutions(self):
+        reduction = presolve(self.instance)
+        for solution in solve(self.instance):
+            edges = {tuple(edge) for edge in solution}
+            self.assertTrue(reduction.fixed <= edges)
+            self.assertFalse(reduction.removed & edges)
+
+    def test_diagram_over_remaining_edges(self):
+        diagram = build_diagram(self.instance)
+        reduction = diagram.reduction
+        self.assertEqual(len(reduction.edges), len(diagram.edges))
+        self.assertEqual(reduction.total,
+                         len(self.instance.make_graph().edges()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import multiprocessing
+import unittest
+from algorithms.regions import split_regions, are_pairs_inside
+from algorithms.solver import (solve, count_solutions, solutions_range,
+                               build_regions, build_diagram,
+                               combine_solutions, combination_at,
+                               count_regions, count_paths)
+from algorithms.backtrack import solve_backtracking
+from algorithms.presolve import presolve
+from numberlink import HexLink
+from unittest import mock
+
+
+def as_set(solutions):
+    return {frozenset(frozenset(edge) for edge in solution)
+            for solution in solutions}
+
+
+class RegionsTest(unittest.TestCase):
+    def setUp(self):
+        self.instance_many_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [1, 2],      # 1 2
+        ])
+        self.instance_regions = HexLink([
+            [1, 0, 0],
+            [3, 0, 0, 0],
+            [3, 1, 0, 0, 0],
+            [0, 0, 2, 4],
+            [0, 2, 4]
+        ])
+
+    def test_split_regions(self):
+        edges = [[(0, 0), (0, 1)], [(2, 0), (2, 1)], [(0, 1), (1, 1)]]
+        self.assertListEqual([[edges[0], edges[2]], [edges[1]]],
+                             split_regions(edges))
+
+    def test_pairs_inside(self):
+        regions = [[[(0, 0), (0, 1)]], [[(2, 0), (2, 1)]]]
+        self.assertTrue(are_pairs_inside(regions, {
+            "pairs": {frozenset([(0, 0), (0, 1)])}
+        }))
+        self.assertFalse(are_pairs_inside(regions, {
+            "pairs": {frozenset([(0, 0), (2, 1)])}
+        }))
+
+    def test_regions_solutions(self):
+        diagrams = build_regions(self.instance_regions)
+        self.assertEqual(2, len(diagrams))
+        actual = list(solve(self.instance_regions))
+        self.assertEqual(len(actual), len(as_set(actual)))
+        self.assertSetEqual(as_set(solve_backtracking(self.instance_regions)),
+                            as_set(actual))
+        diagram = build_diagram(self.instance_regions)
+        self.assertEqual(count_paths(diagram)[diagram.root],
+                         count_solutions(self.instance_regions))
+        self.assertListEqual(actual,
+                             list(solutions_range(self.instance_regions, 0)))
+
+    def test_combination_order(self):
+        diagram = build_diagram(self.instance_many_solutions)
+        diagrams = [diagram, diagram]
+        counts = count_regions(diagrams)
+        combinations = list(combine_solutions(diagrams))
+        self.assertEqual(16, len(combinations))
+        for index, solution in enumerate(combinations):
+            self.assertListEqual(solution,
+                                 combination_at(diagrams, index, counts))
+        self.assertRaises(IndexError, combination_at, diagrams, 16, counts)
+
+    @mock.patch("algorithms.solver.PARALLEL_REGION_SIZE", 1)
+    def test_parallel_build(self):
+        expected = combine_solutions(build_regions(self.instance_regions))
+        actual = combine_solutions(build_regions(self.instance_regions,
+                                                 jobs=2))
+        self.assertListEqual(list(expected), list(actual))
+
+    @mock.patch("algorithms.solver.PARALLEL_LEVEL_SIZE", 1)
+    @mock.patch("algorithms.solver.PARALLEL_REGION_SIZE", 20)
+    def test_one_large_region_uses_level_pool(self):
+        regions = split_regions(presolve(self.instance_regions).edges)
+        self.assertEqual(1, sum(len(region) >= 20 for region in regions))
+        expected = list(combine_solutions(
+            build_regions(self.instance_regions)))
+        with mock.patch("multiprocessing.Pool",
+                        wraps=multiprocessing.Pool) as pool:
+            diagrams = build_regions(self.instance_regions, jobs=2)
+        pool.assert_called()
+        self.assertListEqual(expected, list(combine_solutions(diagrams)))
+
+    def test_small_regions_without_pool(self):
+        with mock.patch("multiprocessing.Pool") as pool:
+            diagrams = build_regions(self.instance_regions, jobs=2)
+        pool.assert_not_called()
+        self.assertListEqual(list(combine_solutions(diagrams)),
+                             list(solve(self.instance_regions)))
+
+    def test_progress(self):
+        levels = []
+        build_regions(self.instance_regions,
+                      progress=lambda level, total: levels.append(
+                          (level, total)))
+        total = levels[-1][1]
+        self.assertListEqual([(level, total) for level in range(1, total + 1)],
+                             levels)
@@ -0,0 +1,128 @@
+import unittest
+from algorithms.sat import (Encoding, BinaryBackend, find_backend,
+                            solve_sat)
+from algorithms.solver import (solve, make_field_from_solution,
+                               describe_engine)
+from numberlink import HexLink
+
+
+def as_set(solutions):
+    return {frozenset(frozenset(map(tuple, edge)) for edge in solution)
+            for solution in solutions}
+
+
+def has_backend():
+    try:
+        find_backend()
+        return True
+    except ValueError:
+        return False
+
+
+def make_model(encoding, instance, solution):
+    """
+    Возвращает множество истинных переменных, задающее решение.
+    """
+    field = make_field_from_solution(instance, solution)
+    model = {encoding.edge_variables[tuple(map(tuple, edge))]
+             for edge in solution}
+    model.update(encoding.colour((i, j), field[i][j])
+                 for i, j in encoding.cells)
+    return model
+
+
+def is_satisfied(clauses, model):
+    return all(any((literal > 0) == (abs(literal) in model)
+                   for literal in clause)
+               for clause in clauses)
+
+
+class EncodingTest(unittest.TestCase):
+    def setUp(self):
+        self.instance_many_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [1, 2],      # 1 2
+        ])
+        self.instance = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 2],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [1, 0, 2]
+        ])
+
+    def test_solutions_satisfy_encoding(self):
+        for instance in (self.instance_many_solutions, self.instance):
+            encoding = Encoding(instance)
+            for solution in solve(instance, engine="zdd"):
+                model = make_model(encoding, instance, solution)
+                self.assertTrue(is_satisfied(encoding.clauses, model))
+                self.assertSetEqual(as_set([solution]),
+                                    as_set([encoding.decode(model)]))
+
+    def test_wrong_number_violates_encoding(self):
+        encoding = Encoding(self.instance)
+        solution = next(solve(self.instance, engine="zdd"))
+        model = make_model(encoding, self.instance, solution)
+        model.discard(encoding.colour((0, 0), 1))
+        model.add(encoding.colour((0, 0), 2))
+        self.assertFalse(is_satisfied(encoding.clauses, model))
+
+    def test_cycles(self):
+        encoding = Encoding(self.instance)
+        cycle = [((2, 1), (2, 2)), ((1, 1), (2, 2)), ((1, 1), (2, 1))]
+        path = [((0, 0), (1, 0))]
+        self.assertEqual([sorted(cycle)], encoding.get_cycles(cycle + path))
+        self.assertEqual([], encoding.get_cycles(path))
+
+
+class BackendTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual({1, 3},
+                         BinaryBackend.parse("c comment\ns SATISFIABLE\n"
+                                             "v 1 -2\nv 3 0\n"))
+        self.assertIsNone(BinaryBackend.parse("s UNSATISFIABLE\n"))
+        self.assertRaises(ValueError, BinaryBackend.parse, "")
+
+    def test_missing_backend(self):
+        self.assertRaises(ValueError, find_backend, "no-such-sat-solver")
+
+    def test_describe_engine(self):
+        self.assertEqual("backtrack", describe_engine("auto", 1))
+        self.assertEqual("zdd", describe_engine("auto", None))
+
+
+@unittest.skipUnless(has_backend(), "SAT-решатель не установлен")
+class SolveSatTest(unittest.TestCase):
+    def setUp(self):
+        self.instance_many_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [1, 2],      # 1 2
+        ])
+        self.instance_no_solutions = HexLink([
+            [1, 2],      # 1 2
+            [0, 0, 0],  # 0 0 0
+            [2, 1]       # 2 1
+        ])
+        self.instance = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 1]
+        ])
+
+    def test_same_solutions_as_diagram(self):
+        for instance in (self.instance_many_solutions,
+                         self.instance_no_solutions,
+                         self.instance):
+            actual = list(solve_sat(instance))
+            self.assertEqual(len(actual), len(as_set(actual)))
+            self.assertSetEqual(as_set(solve(instance, engine="zdd")),
+                                as_set(actual))
+
+    def test_limit(self):
+        self.assertEqual(1, len(list(solve(self.instance, 1, engine="sat"))))
+        self.assertTrue(describe_engine("sat", 1).startswith("sat ("))
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from algorithms.serialization import (dump_diagram, read_diagram,
+                                      save_diagram, load_diagram)
+from algorithms.solver import (build_diagram, make_solutions, count_paths,
+                               sample_paths, path_at)
+from algorithms.structures import Node
+from numberlink import HexLink
+
+
+class SerializationTest(unittest.TestCase):
+    def setUp(self):
+        self.instance = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 2],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [1, 0, 2]
+        ])
+        self.diagram = build_diagram(self.instance)
+
+    def assert_same_diagram(self, expected, actual):
+        self.assertEqual(len(expected.nodes), len(actual.nodes))
+        self.assertListEqual(list(expected.edges), actual.edges)
+        self.assertEqual(expected.ordering.name, actual.ordering.name)
+        self.assertEqual(expected.ordering.width, actual.ordering.width)
+        self.assertListEqual(list(make_solutions(expected.root)),
+                             list(make_solutions(actual.root)))
+
+    def test_round_trip(self):
+        loaded = read_diagram(dump_diagram(self.diagram))
+        self.assert_same_diagram(self.diagram, loaded)
+
+    def test_count_and_sample_loaded(self):
+        loaded = read_diagram(dump_diagram(self.diagram))
+        counts = count_paths(self.diagram)
+        loaded_counts = count_paths(loaded)
+        self.assertEqual(counts[self.diagram.root], loaded_counts[loaded.root])
+        self.assertListEqual(sample_paths(self.diagram, 5, seed=3),
+                             sample_paths(loaded, 5, seed=3))
+        self.assertListEqual(path_at(self.diagram, 7, counts),
+                             path_at(loaded, 7, loaded_counts))
+
+    def test_round_trip_no_solutions(self):
+        diagram = build_diagram(HexLink([[1, 2], [0, 0, 0], [2, 1]]))
+        loaded = read_diagram(dump_diagram(diagram))
+        self.assertIs(Node.TERMINAL_ZERO, loaded.root)
+        self.assertListEqual([], loaded.nodes)
+
+    def test_save_and_load(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            save_diagram(self.diagram, path)
+            self.assert_same_diagram(self.diagram, load_diagram(path))
+        finally:
+            os.remove(path)
+
+    def test_read_corrupted(self):
+        data = dump_diagram(self.diagram)
+        with self.assertRaises(ValueError):
+            read_diagram(data[:-1])
+        with self.assertRaises(ValueError):
+            read_diagram(b"XXXX" + data[4:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 from algorithms.solver import *
+from algorithms.serialization import dump_diagram
 from numberlink import HexLink
+import collections
 from graph_tools import Graph
+from unittest import mock
 import unittest
 
 
@@ -32,53 +35,52 @@ class SolverTest(unittest.TestCase):
         self.update_mate_tester(
             expected={
                 "p": "q",
-                "q": "p",
-                "r": "r",
-                "s": "s"
+                "q": "p"
             },
-            parent_node=Node(
-                self.graph.edges()[0],
-                {v: v for v in self.graph.vertices()},
-                1),
-            domain=list("pqrs")
+            level=0,
+            parent_mate={
+                "p": "p",
+                "q": "q"
+            }
         )
 
         self.update_mate_tester(
             expected={
                 "q": "r",
-                "r": "q",
-                "s": "s"
+                "r": "q"
             },
-            parent_node=Node(
-                self.graph.edges()[1],
-                {
-                    "p": "q",
-                    "q": "p",
-                    "r": "r",
-                    "s": "s"
-                },
-                1),
-            domain=list("qrs")
+            level=1,
+            parent_mate={
+                "p": "q",
+                "q": "p",
+                "r": "r"
+            }
         )
 
         self.update_mate_tester(
             expected={
-                "q": 0,
-                "s": "s"
+                "q": 0
             },
-            parent_node=Node(
-                self.graph.edges()[2],
-                {
-                    "q": "p",
-                    "r": "r",
-                    "s": "s"
-                },
-                1),
-            domain=list("qs")
+            level=2,
+            parent_mate={
+                "q": "p",
+                "r": "r"
+            }
         )
 
-    def update_mate_tester(self, expected, parent_node, domain):
-        actual = update_domain(update_mate(parent_node), domain)
+    def update_mate_tester(self, expected, level, parent_mate):
+        frontier = compile_frontier(
+            self.graph.edges(), {"vertices": set(), "pairs": set()}
+        )
+        ids = {v: i for i, v in enumerate(frontier.vertices) if v}
+        names = {i: v for v, i in ids.items()}
+        names[0] = 0
+        level = frontier.levels[level]
+        domain = sorted(level.positions, key=level.positions.get)
+        state = tuple(ids.get(parent_mate[names[v]], 0) for v in domain)
+        mate = update_domain(update_mate(state, level), level.keep)
+        actual = {names[domain[i]]: names[value]
+                  for i, value in zip(level.keep, mate)}
         self.assertDictEqual(expected, actual)
 
     def test_solve_one_solution(self):
@@ -95,24 +97,24 @@ class SolverTest(unittest.TestCase):
 
     def test_solve_many_solutions(self):
         expected = [
-            [[(0, 0), (1, 0)],
-             [(0, 1), (1, 1)],
+            [[(0, 0), (1, 1)],
+             [(1, 0), (1, 1)],
+             [(0, 1), (1, 2)],
              [(1, 0), (2, 0)],
-             [(1, 1), (1, 2)],
              [(1, 2), (2, 1)]],
             [[(0, 0), (1, 0)],
              [(0, 1), (1, 2)],
-             [(1, 0), (2, 0)],
              [(1, 1), (1, 2)],
+             [(1, 0), (2, 0)],
              [(1, 1), (2, 1)]],
             [[(0, 0), (1, 0)],
-             [(0, 1), (1, 2)],
              [(1, 0), (1, 1)],
+             [(0, 1), (1, 2)],
              [(1, 1), (2, 0)],
              [(1, 2), (2, 1)]],
-            [[(0, 0), (1, 1)],
-             [(0, 1), (1, 2)],
-             [(1, 0), (1, 1)],
+            [[(0, 0), (1, 0)],
+             [(0, 1), (1, 1)],
+             [(1, 1), (1, 2)],
              [(1, 0), (2, 0)],
              [(1, 2), (2, 1)]]
         ]
@@ -125,6 +127,173 @@ class SolverTest(unittest.TestCase):
         actual = list(solve(self.instance_no_solutions))
         self.assertListEqual(expected, actual)
 
+    def test_build_diagram_is_reduced(self):
+        diagram = build_diagram(self.instance_many_solutions)
+        signatures = [
+            (tuple(node.edge), id(node.zero_child), id(node.one_child))
+            for node in diagram.nodes
+        ]
+        self.assertEqual(len(signatures), len(set(signatures)))
+        for node in diagram.nodes:
+            self.assertIsNot(Node.TERMINAL_ZERO, node.one_child)
+
+    def test_build_diagram_no_solutions(self):
+        diagram = build_diagram(self.instance_no_solutions)
+        self.assertIs(Node.TERMINAL_ZERO, diagram.root)
+        self.assertListEqual([], diagram.nodes)
+
+    def test_count_solutions(self):
+        self.assertEqual(1, count_solutions(self.instance_one_solution))
+        self.assertEqual(4, count_solutions(self.instance_many_solutions))
+        self.assertEqual(0, count_solutions(self.instance_no_solutions))
+
+    def test_make_solutions_as_masks(self):
+        diagram = build_diagram(self.instance_many_solutions)
+        expected = list(make_solutions(diagram.root))
+        actual = [decode_mask(mask, diagram.edges)
+                  for mask in make_solutions(diagram.root, as_masks=True)]
+        self.assertListEqual(expected, actual)
+
+    def test_make_solutions_deep_diagram(self):
+        depth = 5000
+        root = Node.TERMINAL_ONE
+        for i in reversed(range(depth)):
+            node = Node((i, i + 1), None, i)
+            node.add_children(Node.TERMINAL_ZERO, root)
+            root = node
+        solutions = list(make_solutions(root))
+        self.assertEqual(1, len(solutions))
+        self.assertEqual(depth, len(solutions[0]))
+
+    def test_sample_solutions(self):
+        expected = list(solve(self.instance_many_solutions))
+        samples = sample_solutions(self.instance_many_solutions, 200, seed=1)
+        self.assertEqual(200, len(samples))
+        for sample in samples:
+            self.assertIn(sample, expected)
+        self.assertEqual(len(expected),
+                         len({str(sample) for sample in samples}))
+
+    def test_sample_solutions_reproducible(self):
+        first = sample_solutions(self.instance_many_solutions, 10, seed=7)
+        second = sample_solutions(self.instance_many_solutions, 10, seed=7)
+        self.assertListEqual(first, second)
+
+    def test_sample_solutions_no_solutions(self):
+        self.assertListEqual(
+            [], sample_solutions(self.instance_no_solutions, 3, seed=0)
+        )
+
+    def test_solution_at(self):
+        expected = list(solve(self.instance_many_solutions))
+        for i, solution in enumerate(expected):
+            actual = solution_at(self.instance_many_solutions, i)
+            self.assertListEqual(solution, actual)
+
+    def test_solution_at_out_of_range(self):
+        with self.assertRaises(IndexError):
+            solution_at(self.instance_many_solutions, 4)
+        with self.assertRaises(IndexError):
+            solution_at(self.instance_no_solutions, 0)
+
+    def test_solutions_range(self):
+        expected = list(solve(self.instance_many_solutions))
+        instance = self.instance_many_solutions
+        self.assertListEqual(expected[1:3],
+                             list(solutions_range(instance, 1, 3)))
+        self.assertListEqual(expected[2:],
+                             list(solutions_range(instance, 2)))
+        self.assertListEqual(expected[3:],
+                             list(solutions_range(instance, 3, 10)))
+
+    def test_make_field_from_solution(self):
+        expected = [
+            [1, 1],
+            [2, 2, 1],
+            [2, 2]
+        ]
+        solution = next(solve(self.instance_one_solution))
+        actual = make_field_from_solution(self.instance_one_solution,
+                                          solution)
+        self.assertListEqual(expected, actual)
+
+    def test_make_fields_from_solutions(self):
+        instance = self.instance_many_solutions
+        solutions = list(solve(instance))
+        expected = [make_field_from_solution(instance, solution)
+                    for solution in solutions]
+        actual = list(make_fields_from_solutions(instance, solutions))
+        self.assertListEqual(expected, actual)
+
+    def test_solve_limit(self):
+        expected = list(solve(self.instance_many_solutions))[:2]
+        actual = list(solve(self.instance_many_solutions, limit=2))
+        self.assertListEqual(expected, actual)
+
+    def test_count_solutions_limit(self):
+        instance = self.instance_many_solutions
+        self.assertEqual(2, count_solutions(instance, limit=2))
+        self.assertEqual(4, count_solutions(instance, limit=10))
+
+    def test_has_unique_solution(self):
+        self.assertTrue(has_unique_solution(self.instance_one_solution))
+        self.assertFalse(has_unique_solution(self.instance_many_solutions))
+        self.assertFalse(has_unique_solution(self.instance_no_solutions))
+
+    def test_build_diagram_progress(self):
+        reached = []
+        diagram = build_diagram(self.instance_many_solutions,
+                                progress=lambda *args: reached.append(args))
+        total = len(diagram.edges)
+        self.assertListEqual([(i, total) for i in range(1, total + 1)],
+                             reached)
+
+    def test_build_diagram_cancelled(self):
+        def cancel(level, total):
+            if level == 2:
+                raise InterruptedError()
+
+        with self.assertRaises(InterruptedError):
+            build_diagram(self.instance_many_solutions, progress=cancel)
+
+    @mock.patch("algorithms.solver.PARALLEL_LEVEL_SIZE", 1)
+    def test_build_diagram_parallel(self):
+        instance = HexLink([
+            [1, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 1]
+        ])
+        self.assertEqual(dump_diagram(build_diagram(instance)),
+                         dump_diagram(build_diagram(instance, jobs=2)))
+        self.assertListEqual(list(solve(instance)),
+                             list(solve(instance, jobs=2)))
+        self.assertEqual(count_solutions(instance),
+                         count_solutions(instance, jobs=3))
+
+    def test_build_diagram_small_levels_without_pool(self):
+        with mock.patch("multiprocessing.Pool") as pool:
+            diagram = build_diagram(self.instance_many_solutions, jobs=2)
+        pool.assert_not_called()
+        self.assertEqual(4, count_paths(diagram)[diagram.root])
+
+    def test_count_edge_solutions(self):
+        instance = self.instance_many_solutions
+        expected = collections.Counter(
+            frozenset(edge) for solution in solve(instance)
+            for edge in solution
+        )
+        actual = count_edge_solutions(build_regions(instance))
+        self.assertDictEqual(dict(expected),
+                             {edge: n for edge, n in actual.items() if n})
+
+    def test_solutions_range_parallel(self):
+        self.assertListEqual(
+            list(solutions_range(self.instance_many_solutions, 1, 3)),
+            list(solutions_range(self.instance_many_solutions, 1, 3, jobs=2))
+        )
+
 
 if __name__ == "__main__":
     unittest.main()